@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Used when OUTBOUND_HTTP does not configure a service, or outside of Django
+DEFAULT_SERVICE = {
+    "timeout": (3.05, 10),  # connect and read timeouts in seconds
+    "retries": 0,
+    "pool_size": 10,
+    "failure_threshold": 5,  # consecutive failures that open the circuit
+    "reset_timeout": 60,  # seconds before a request is let through again
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an upstream service that keeps failing."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a service after failure_threshold consecutive failures.
+    After reset_timeout seconds a single trial request is let through:
+    if it succeeds the circuit closes, otherwise it stays open for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: this caller is the trial, the others keep short-circuiting
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class ServiceClient:
+    """
+    An HTTP client for one upstream service: a keep-alive session with its own
+    connection pool, a default timeout, a circuit breaker and latency metrics.
+    """
+
+    def __init__(
+        self, name, timeout, retries, pool_size, failure_threshold, reset_timeout
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=("GET",),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "total_time": 0.0,
+            "max_time": 0.0,
+        }
+
+    def get(self, url, **kwargs):
+        """
+        The get function sends a GET request to the service.
+        Connection errors, timeouts, 5xx and 429 responses count as failures of the service;
+        once the circuit is open, CircuitOpenError is raised without calling the service,
+        so callers fall back to their cached data right away.
+
+        :param url: The requested url
+        :param **kwargs: Passed to requests, timeout defaults to the service timeout
+        :return: A requests response
+        :doc-author: Trelent
+        """
+        if not self.breaker.allow_request():
+            with self._stats_lock:
+                self.stats["short_circuited"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            self._record(time.perf_counter() - started, failed=True)
+            raise
+        failed = response.status_code >= 500 or response.status_code == 429
+        self._record(time.perf_counter() - started, failed=failed)
+        return response
+
+    def _record(self, elapsed, failed):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["total_time"] += elapsed
+            self.stats["max_time"] = max(self.stats["max_time"], elapsed)
+            if failed:
+                self.stats["failures"] += 1
+        logger.debug("%s request took %.3fs (failed=%s)", self.name, elapsed, failed)
+        if not failed:
+            self.breaker.record_success()
+        elif self.breaker.record_failure():
+            logger.warning(
+                "%s circuit opened after %d failures",
+                self.name,
+                self.breaker.failures,
+            )
+
+    def metrics(self):
+        """
+        The metrics function returns a snapshot of the upstream latency metrics.
+
+        :return: A dictionary
+        :doc-author: Trelent
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["avg_time"] = (
+            stats["total_time"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        stats["circuit_open"] = self.breaker.is_open
+        return stats
+
+
+def service_config(name):
+    """
+    The service_config function returns the settings of a service from OUTBOUND_HTTP,
+    completed with the defaults.
+
+    :param name: The name of the service
+    :return: A dictionary
+    :doc-author: Trelent
+    """
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+
+    config = dict(DEFAULT_SERVICE)
+    try:
+        config.update(getattr(settings, "OUTBOUND_HTTP", {}).get(name, {}))
+    except ImproperlyConfigured:
+        pass  # e.g. the scraper is run as a plain script
+    return config
+
+
+def get_client(name):
+    """
+    The get_client function returns the shared client of a service, creating it on first use.
+
+    :param name: The name of the service, e.g. "newsapi"
+    :return: A ServiceClient
+    :doc-author: Trelent
+    """
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ServiceClient(name, **service_config(name))
+        return _clients[name]
+
+
+def metrics():
+    """
+    The metrics function returns the latency metrics of every service used so far.
+
+    :return: A dictionary of metrics keyed by service name
+    :doc-author: Trelent
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.metrics() for client in clients}
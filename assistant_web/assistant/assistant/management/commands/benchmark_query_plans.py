@@ -0,0 +1,194 @@
+import datetime
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from assistant.pagination import keyset_filter
+from contacts.models import Contact
+from contacts.views import CONTACT_ORDERING, birthdays_within, user_contacts
+from docs.models import File
+from news.models import News
+from notes.models import Note
+from notes.views import NOTE_ORDERING
+
+BENCHMARK_USER = "benchmark_plans"
+BENCHMARK_NEWS_URL = "https://benchmark.invalid/"
+
+
+def access_paths(user):
+    """
+    The access_paths function lists the queries the views run for a user,
+    each with the name of the index that should serve it.
+
+    :param user: The user whose pages are queried
+    :return: A list of (label, queryset, index name) tuples
+    :doc-author: Trelent
+    """
+    page = settings.LIST_PAGE_SIZE
+    contacts = user_contacts(user).order_by(*CONTACT_ORDERING)
+    notes = Note.objects.filter(user=user).order_by(*NOTE_ORDERING)
+    files = File.objects.filter(user=user)
+    return [
+        ("contact list", contacts[:page], "contact_user_name_idx"),
+        (
+            "contact list, next page",
+            contacts.filter(keyset_filter(CONTACT_ORDERING, ["M", "", 0]))[:page],
+            "contact_user_name_idx",
+        ),
+        (
+            "upcoming birthdays",
+            birthdays_within(
+                Contact.objects.filter(user=user), datetime.date(2024, 12, 28), 7
+            ),
+            "contact_user_birthday_idx",
+        ),
+        ("note list", notes[:page], "note_user_tags_idx"),
+        (
+            "file list",
+            files.select_related("blob").order_by("-upload_date", "-pk")[:page],
+            "file_user_upload_idx",
+        ),
+        (
+            "file list, largest",
+            files.select_related("blob").order_by("-size", "-pk")[:page],
+            "file_user_size_idx",
+        ),
+        (
+            "file categories",
+            files.values_list("category", flat=True).distinct(),
+            "file_user_category_idx",
+        ),
+        (
+            "newest news of a topic",
+            News.objects.filter(topic="world").order_by("-date")[:5],
+            "news_topic_date_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Check on synthetic data that every per-user page is served by its composite index "
+        "(PostgreSQL only, the synthetic data is deleted afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=50,
+            help="Number of synthetic users",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=400,
+            help="Contacts, notes and files of every synthetic user",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the full query plans",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans are only checked on PostgreSQL")
+
+        missing = []
+        try:
+            user = self.fill(options["users"], options["rows"])
+            for label, queryset, index in access_paths(user):
+                plan = self.explain(queryset)
+                used = index in plan
+                if not used:
+                    missing.append(label)
+                timing = plan.strip().splitlines()[-1]
+                self.stdout.write(
+                    f"{'ok' if used else 'MISSING':>7}  {label:<24} {index:<26} {timing}"
+                )
+                if options["plans"] or not used:
+                    self.stdout.write(plan)
+        finally:
+            User.objects.filter(username__startswith=BENCHMARK_USER).delete()
+            News.objects.filter(url__startswith=BENCHMARK_NEWS_URL).delete()
+
+        if missing:
+            raise CommandError(f"Not served by their index: {', '.join(missing)}")
+
+    def fill(self, users, rows):
+        """
+        The fill function creates the synthetic users, their contacts, notes and files, and news,
+        then vacuums the tables, so the planner has fresh statistics and may use index-only scans.
+
+        :param users: The number of users
+        :param rows: The number of contacts, notes and files of every user
+        :return: The first synthetic user
+        :doc-author: Trelent
+        """
+        owners = User.objects.bulk_create(
+            [User(username=f"{BENCHMARK_USER}_{n}") for n in range(users)]
+        )
+        names = ["Andrii", "Iryna", "Mykola", "Olena", "Sofiia", "Taras"]
+        birthdates = [
+            datetime.date(1990, 1, 1) + datetime.timedelta(days=day)
+            for day in range(365)
+        ]
+        contacts = []
+        for owner in owners:
+            for n in range(rows):
+                birthdate = random.choice(birthdates)
+                contacts.append(
+                    Contact(
+                        user=owner,
+                        name=f"{random.choice(names)}{n}",
+                        thurname=random.choice(["Melnyk", "Kravets", None]),
+                        # bulk_create does not call save(), the birthday_key
+                        # is computed by the database
+                        birthdate=birthdate,
+                    )
+                )
+        Contact.objects.bulk_create(contacts)
+        Note.objects.bulk_create(
+            Note(user=owner, text=f"note {n}", tags=random.choice(names))
+            for owner in owners
+            for n in range(rows)
+        )
+        categories = [choice for choice, _ in File.CATEGORY_CHOICES]
+        File.objects.bulk_create(
+            File(
+                user=owner,
+                file=f"files/benchmark{n}.txt",
+                category=random.choice(categories),
+                size=random.randrange(1 << 30),
+            )
+            for owner in owners
+            for n in range(rows)
+        )
+        topics = ["main", "war", "science", "world", "society", "economics", "sport"]
+        News.objects.bulk_create(
+            News(
+                title=f"News {n}",
+                content="",
+                url=f"{BENCHMARK_NEWS_URL}{topic}/{n}",
+                topic=topic,
+                date=timezone.now() - datetime.timedelta(minutes=n),
+            )
+            for topic in topics
+            for n in range(rows * users // len(topics))
+        )
+        with connection.cursor() as cursor:
+            for model in (User, Contact, Note, File, News):
+                cursor.execute(f"VACUUM ANALYZE {model._meta.db_table}")
+        return owners[0]
+
+    @staticmethod
+    def explain(queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN ANALYZE {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
@@ -33,7 +33,7 @@ class SetLanguageMiddleware:
         self.process_request(request)
         response = self.get_response(request)
         language = request.GET.get("lang")
-        if language:
+        if language and request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME) != language:
             response.set_cookie(settings.LANGUAGE_COOKIE_NAME, language)
         return response
 
@@ -41,6 +41,7 @@ class SetLanguageMiddleware:
         """
         The process_request function is called on every request. It gets the current language from the request,
         activates it and saves it in the session.
+        The session is only written when the language changes, so most requests do not save the session.
 
         :param self: Represent the instance of the object itself
         :param request: Get the language from the get request
@@ -56,4 +57,5 @@ class SetLanguageMiddleware:
 
         if language:
             translation.activate(language)
-            request.session[LANGUAGE_SESSION_KEY] = language
+            if request.session.get(LANGUAGE_SESSION_KEY) != language:
+                request.session[LANGUAGE_SESSION_KEY] = language
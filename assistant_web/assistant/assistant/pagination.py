@@ -0,0 +1,194 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps the microseconds of datetimes, which DjangoJSONEncoder rounds to milliseconds:
+    a rounded value would make the next page skip or repeat rows.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) paginated list.
+    Instead of an OFFSET, the next page starts right after the sort key of the last row,
+    so every page costs an index range scan no matter how deep the user scrolls.
+    """
+
+    def __init__(self, items, request, cursor, next_cursor):
+        self.items = items
+        self.request = request
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    @property
+    def next_query(self):
+        query = self.request.GET.copy()
+        query["cursor"] = self.next_cursor
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        query = self.request.GET.copy()
+        query.pop("cursor", None)
+        return query.urlencode()
+
+
+def encode_cursor(values):
+    """
+    The encode_cursor function packs the sort key of a row into an opaque url-safe string.
+
+    :param values: The values of the ordering fields
+    :return: A string
+    :doc-author: Trelent
+    """
+    data = json.dumps(values, cls=CursorEncoder).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def decode_cursor(cursor, size):
+    """
+    The decode_cursor function unpacks a cursor made by encode_cursor.
+    A missing or malformed cursor gives None, which means the first page.
+
+    :param cursor: The cursor from the query string
+    :param size: The number of ordering fields
+    :return: A list of values, or None
+    :doc-author: Trelent
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def cursor_values(queryset, ordering, values):
+    """
+    The cursor_values function converts the values of a decoded cursor to the python types
+    of the ordering fields, model fields or annotations of queryset.
+    A cursor with a missing or invalid value, e.g. tampered with, gives None.
+
+    :param queryset: The paginated rows
+    :param ordering: The ordering fields, "-" marks a descending field
+    :param values: The values decoded by decode_cursor
+    :return: A list of values, or None
+    :doc-author: Trelent
+    """
+    converted = []
+    for field_name, value in zip(ordering, values):
+        name = field_name.lstrip("-")
+        if name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        elif name == "pk":
+            field = queryset.model._meta.pk
+        else:
+            field = queryset.model._meta.get_field(name)
+        try:
+            value = field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            return None
+        if value is None:
+            return None
+        converted.append(value)
+    return converted
+
+
+def keyset_filter(ordering, values):
+    """
+    The keyset_filter function builds the condition selecting the rows that sort after values:
+    a >= x AND ((a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...)
+    with < instead of > for descending fields.
+    The redundant a >= x bound lets the database start the index scan at the cursor.
+
+    :param ordering: The ordering fields, "-" marks a descending field
+    :param values: The values of the ordering fields of the last row shown
+    :return: A Q object
+    :doc-author: Trelent
+    """
+    first = ordering[0]
+    bound = Q(
+        **{
+            f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[
+                0
+            ]
+        }
+    )
+    condition = Q()
+    for position, field in enumerate(ordering):
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{field.lstrip('-')}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values[:position]):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return bound & condition
+
+
+def paginate_keyset(request, queryset, ordering, page_size=None):
+    """
+    The paginate_keyset function returns the page of queryset selected by the cursor query parameter.
+    The ordering must end with a unique field (e.g. "pk") and its fields must not be NULL,
+    annotate a Coalesce for nullable columns.
+
+    :param request: Get the cursor from the query string
+    :param queryset: The rows to paginate
+    :param ordering: The ordering fields, "-" marks a descending field
+    :param page_size: The number of rows per page, LIST_PAGE_SIZE by default
+    :return: A KeysetPage
+    :doc-author: Trelent
+    """
+    page_size = page_size or settings.LIST_PAGE_SIZE
+    cursor = request.GET.get("cursor")
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        values = cursor_values(queryset, ordering, values)
+    if values is None:
+        cursor = None
+
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    items = list(queryset[: page_size + 1])
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, field.lstrip("-")) for field in ordering]
+        )
+    return KeysetPage(items, request, cursor, next_cursor)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 import environ
+from boto3.s3.transfer import TransferConfig
 from django.utils.translation import gettext_lazy as _
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "phonenumber_field",
     "storages",
+    # The project package, for its cross-app management commands
+    "assistant",
     "contacts",
     "docs",
     "news",
@@ -152,6 +155,10 @@ AWS_SECRET_ACCESS_KEY = env("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = env("AWS_STORAGE_BUCKET_NAME")
 AWS_DEFAULT_ACL = None
 AWS_QUERYSTRING_AUTH = False
+# Presigned urls are signed with Signature Version 4, the only one newer regions accept
+AWS_S3_SIGNATURE_VERSION = "s3v4"
+# Seconds the presigned upload and download urls of docs.presign are valid
+AWS_QUERYSTRING_EXPIRE = env.int("AWS_QUERYSTRING_EXPIRE", default=3600)
 AWS_S3_REGION_NAME = env("AWS_S3_REGION_NAME", default="eu-north-1")
 AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
 AWS_S3_OBJECT_PARAMETERS = {"CacheControl": "max-age=86400"}
@@ -160,9 +167,88 @@ AWS_S3_OBJECT_PARAMETERS = {"CacheControl": "max-age=86400"}
 # STATIC_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_STATIC_LOCATION}/"
 # STATICFILES_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
 DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+# Another S3-compatible endpoint, e.g. "python -m moto.server" or MinIO during development
+AWS_S3_ENDPOINT_URL = env("AWS_S3_ENDPOINT_URL", default="") or None
+if AWS_S3_ENDPOINT_URL:
+    AWS_S3_CUSTOM_DOMAIN = None
+    AWS_S3_ADDRESSING_STYLE = "path"
+# Files above the threshold are sent to S3 as a multipart upload, max_concurrency parts at a time
+AWS_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=env.int("AWS_S3_MULTIPART_THRESHOLD", default=8 * 1024 * 1024),
+    multipart_chunksize=env.int("AWS_S3_MULTIPART_CHUNKSIZE", default=8 * 1024 * 1024),
+    max_concurrency=env.int("AWS_S3_MAX_CONCURRENCY", default=8),
+)
+
+# Chunked uploads are staged in UPLOAD_STAGING_DIR and sent to S3 by UPLOAD_TRANSFER_WORKERS
+# background threads, 0 leaves them to "python manage.py transfer_uploads --every 10" instead.
+# Uploads that stop receiving chunks are deleted after UPLOAD_EXPIRY_HOURS
+UPLOAD_STAGING_DIR = env(
+    "UPLOAD_STAGING_DIR", default=os.path.join(BASE_DIR, "uploads/")
+)
+UPLOAD_CHUNK_SIZE = env.int("UPLOAD_CHUNK_SIZE", default=5 * 1024 * 1024)
+UPLOAD_TRANSFER_WORKERS = env.int("UPLOAD_TRANSFER_WORKERS", default=2)
+UPLOAD_EXPIRY_HOURS = env.int("UPLOAD_EXPIRY_HOURS", default=24)
+# Browsers PUT files up to 5 GB straight to S3 through presigned urls, this needs a CORS rule
+# on the bucket allowing PUT with the Content-Type and Cache-Control headers from the site
+UPLOAD_DIRECT_TO_S3 = env.bool("UPLOAD_DIRECT_TO_S3", default=False)
+
+# Previews of images (rendered with Pillow) and first pages of PDFs (needs pdftoppm of
+# poppler-utils) of at most PREVIEW_SIZE pixels, rendered by PREVIEW_WORKERS background threads;
+# 0 leaves them to "python manage.py generate_previews --every 10". Larger files get no preview
+PREVIEW_SIZE = env.int("PREVIEW_SIZE", default=256)
+PREVIEW_WORKERS = env.int("PREVIEW_WORKERS", default=2)
+PREVIEW_MAX_SOURCE_SIZE = env.int("PREVIEW_MAX_SOURCE_SIZE", default=50 * 1024 * 1024)
 
 NEWSAPI_KEY = env("NEWSAPI_KEY")
 
+# Outbound HTTP clients per upstream service, see assistant/http_client.py
+# timeout is (connect, read) in seconds; after failure_threshold consecutive failures
+# the service is not called for reset_timeout seconds and cached data is served instead
+OUTBOUND_HTTP = {
+    "nbu": {"timeout": (3.05, env.int("CURRENCY_FETCH_TIMEOUT", default=5))},
+    "newsapi": {"timeout": (3.05, env.int("NEWSAPI_TIMEOUT", default=5))},
+    "unian": {"timeout": (3.05, 10), "retries": 2, "pool_size": 8},
+}
+
+# Cache settings, e.g. CACHE_URL=rediscache://127.0.0.1:6379/1 for a shared cache
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# NBU exchange rates are served from the cache and refreshed in the background
+CURRENCY_CACHE_TTL = env.int("CURRENCY_CACHE_TTL", default=3600)
+CURRENCY_FETCH_TIMEOUT = env.int("CURRENCY_FETCH_TIMEOUT", default=5)
+
+# Latest news widget snapshots are cached per language
+NEWS_WIDGET_CACHE_TTL = env.int("NEWS_WIDGET_CACHE_TTL", default=900)
+
+# NewsAPI category pages are cached with their dates already formatted
+NEWSAPI_CACHE_TTL = env.int("NEWSAPI_CACHE_TTL", default=900)
+# Only this refresh calls NewsAPI, user requests are served from the cache (empty until it ran).
+# Keep it shorter than NEWSAPI_CACHE_TTL so the cache never goes cold, 0 disables it;
+# the refresh_newsapi worker that replaces it needs a shared CACHE_URL such as Redis
+NEWSAPI_REFRESH_INTERVAL = env.int("NEWSAPI_REFRESH_INTERVAL", default=600)
+
+# Seconds between in-process news ingestions when running the development server,
+# 0 disables it (run "python manage.py ingest_news --every 3600" as a worker instead)
+NEWS_INGEST_INTERVAL = env.int("NEWS_INGEST_INTERVAL", default=3600)
+
+# Ukrainian news shown per topic page, older news are deleted after NEWS_RETENTION_DAYS
+# (the newest NEWS_FEED_LIMIT of every topic are always kept)
+NEWS_FEED_LIMIT = env.int("NEWS_FEED_LIMIT", default=20)
+NEWS_RETENTION_DAYS = env.int("NEWS_RETENTION_DAYS", default=30)
+# Rendered news lists of the topic pages are cached until the next ingestion, at most this long
+NEWS_PAGE_CACHE_TTL = env.int("NEWS_PAGE_CACHE_TTL", default=3600)
+
+# Rows per page of the contact, note and file lists
+LIST_PAGE_SIZE = env.int("LIST_PAGE_SIZE", default=25)
+
+# Default number of days shown by the upcoming birthdays page
+BIRTHDAYS_WINDOW_DAYS = env.int("BIRTHDAYS_WINDOW_DAYS", default=7)
+
+# Text search configuration of the note search vectors, e.g. "english" to stem English words.
+# Run "python manage.py rebuild_note_search" after changing it, and after the first migrate
+# of a database using another value: the migrations install the trigger with "simple"
+NOTES_SEARCH_CONFIG = env("NOTES_SEARCH_CONFIG", default="simple")
+
 # translator settings
 LANGUAGES = [
     ("en", "English"),
@@ -173,7 +259,12 @@ LOCALE_PATHS = [
     os.path.join(BASE_DIR, "locale"),
 ]
 
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# cached_db reads sessions from the cache and only falls back to the database on a miss,
+# "django.contrib.sessions.backends.cache" drops the database entirely (use a shared, persistent
+# CACHE_URL such as Redis) and "django.contrib.sessions.backends.signed_cookies" keeps them in the browser
+SESSION_ENGINE = env(
+    "SESSION_ENGINE", default="django.contrib.sessions.backends.cached_db"
+)
 LANGUAGE_SESSION_KEY = "django_language"
 
 # smtp server setting to send reset password mails
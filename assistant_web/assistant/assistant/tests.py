@@ -0,0 +1,80 @@
+import base64
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from docs.models import File
+
+from .pagination import decode_cursor, encode_cursor, paginate_keyset
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("pager")
+        sizes = [3, 3, 3, 2, 2, 1, 1, 5]
+        File.objects.bulk_create(
+            File(user=cls.user, file=f"{n}.txt", category="document", size=size)
+            for n, size in enumerate(sizes)
+        )
+        # Ties on the upload date, and dates only a microsecond apart
+        start = timezone.now()
+        for n, pk in enumerate(
+            File.objects.order_by("pk").values_list("pk", flat=True)
+        ):
+            File.objects.filter(pk=pk).update(
+                upload_date=start + timedelta(microseconds=n // 2)
+            )
+
+    def page(self, ordering, cursor=None, page_size=3):
+        query = {"cursor": cursor} if cursor else {}
+        request = RequestFactory().get("/", query)
+        return paginate_keyset(
+            request, File.objects.filter(user=self.user), ordering, page_size
+        )
+
+    def walk(self, ordering):
+        pks, cursor = [], None
+        while True:
+            page = self.page(ordering, cursor)
+            pks.extend(item.pk for item in page)
+            if not page.has_next:
+                return pks
+            cursor = page.next_cursor
+
+    def test_pages_follow_the_ordering(self):
+        for ordering in (
+            ("size", "pk"),
+            ("-size", "pk"),
+            ("size", "-pk"),
+            ("-upload_date", "-pk"),
+            ("upload_date", "pk"),
+        ):
+            with self.subTest(ordering=ordering):
+                expected = File.objects.filter(user=self.user).order_by(*ordering)
+                self.assertEqual(
+                    self.walk(ordering), list(expected.values_list("pk", flat=True))
+                )
+
+    def test_invalid_cursor_gives_the_first_page(self):
+        first = [item.pk for item in self.page(("-upload_date", "-pk"))]
+        for cursor in (
+            encode_cursor(["garbage", 1]),
+            encode_cursor([None, 1]),
+            encode_cursor([timezone.now(), "x"]),
+            encode_cursor([timezone.now()]),
+            base64.urlsafe_b64encode(b"{}").decode(),
+            "not base64!",
+        ):
+            with self.subTest(cursor=cursor):
+                page = self.page(("-upload_date", "-pk"), cursor)
+                self.assertTrue(page.is_first)
+                self.assertEqual([item.pk for item in page], first)
+
+    def test_cursor_keeps_the_microseconds(self):
+        moment = timezone.now().replace(microsecond=123456)
+        self.assertEqual(
+            decode_cursor(encode_cursor([moment, 1]), 2), [moment.isoformat(), 1]
+        )
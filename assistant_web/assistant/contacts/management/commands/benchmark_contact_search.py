@@ -0,0 +1,160 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from contacts.models import Contact
+from contacts.views import find_contacts, user_contacts
+
+BENCHMARK_USER = "benchmark_contacts"
+
+FIRST_NAMES = [
+    "Olena",
+    "Ivan",
+    "Mykola",
+    "Oksana",
+    "Taras",
+    "Iryna",
+    "Andrii",
+    "Sofiia",
+]
+SURNAMES = ["Kovalenko", "Shevchenko", "Bondarenko", "Tkachenko", "Kravets", "Melnyk"]
+CITIES = ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Poltava", "Uzhhorod"]
+STREETS = ["Khreshchatyk", "Sadova", "Shevchenka", "Franka", "Lesi Ukrainky"]
+
+FILL_SQL = """
+    INSERT INTO {table} (name, thurname, address, phone, email, birthdate, user_id, created_date)
+    SELECT
+        (%(first)s::text[])[1 + i %% %(n_first)s] || (i %% 997)::text,
+        (%(sur)s::text[])[1 + (i / 7) %% %(n_sur)s],
+        (%(cities)s::text[])[1 + (i / 3) %% %(n_cities)s] || ', '
+            || (%(streets)s::text[])[1 + i %% %(n_streets)s] || ' ' || (1 + i %% 200)::text,
+        '+38050' || lpad(i::text, 7, '0'),
+        'user' || i::text || '@example.com',
+        DATE '1950-01-01' + (i * 37) %% 20000,
+        %(user_id)s,
+        now()
+    FROM generate_series(1, %(rows)s) AS i
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the contact search on a synthetic table, "
+        "with and without its trigram indexes (PostgreSQL only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic contacts",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs of every query, the median is reported",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic contacts for the next run",
+        )
+        parser.add_argument(
+            "queries",
+            nargs="*",
+            default=[
+                "Kovalenko",
+                "ivan42",
+                "0501234",
+                "user98765@",
+                "Uzhhorod, Franka 7",
+            ],
+            help="Searched texts",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The trigram indexes only exist on PostgreSQL")
+
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USER)
+        try:
+            self.fill(user, options["rows"])
+            contacts = user_contacts(user)
+            for query in options["queries"]:
+                indexed = self.measure(contacts, query, options["repeat"], True)
+                scanned = self.measure(contacts, query, options["repeat"], False)
+                self.stdout.write(
+                    f"{query!r:>22}: {indexed * 1000:8.1f} ms with trigram indexes, "
+                    f"{scanned * 1000:8.1f} ms without ({scanned / indexed:.0f}x)"
+                )
+        finally:
+            if not options["keep"]:
+                user.delete()
+
+    def fill(self, user, rows):
+        """
+        The fill function creates the synthetic contacts of the benchmark user in a single statement,
+        unless a kept table of the same size already exists.
+
+        :param user: The owner of the synthetic contacts
+        :param rows: The number of contacts
+        :return: None
+        :doc-author: Trelent
+        """
+        existing = Contact.objects.filter(user=user).count()
+        if existing == rows:
+            return
+        Contact.objects.filter(user=user).delete()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                FILL_SQL.format(table=Contact._meta.db_table),
+                {
+                    "first": FIRST_NAMES,
+                    "n_first": len(FIRST_NAMES),
+                    "sur": SURNAMES,
+                    "n_sur": len(SURNAMES),
+                    "cities": CITIES,
+                    "n_cities": len(CITIES),
+                    "streets": STREETS,
+                    "n_streets": len(STREETS),
+                    "user_id": user.pk,
+                    "rows": rows,
+                },
+            )
+            cursor.execute(f"ANALYZE {Contact._meta.db_table}")
+        self.stdout.write(
+            f"Created {rows} contacts in {time.perf_counter() - started:.1f}s"
+        )
+
+    def measure(self, contacts, query, repeat, use_indexes):
+        """
+        The measure function returns the median time of fetching the first page of results.
+        Without indexes, bitmap scans are disabled, which is the only way a GIN index is read,
+        so the planner has to filter every contact of the user.
+
+        :param contacts: The searched queryset
+        :param query: The searched text
+        :param repeat: The number of runs
+        :param use_indexes: Whether the trigram indexes may be used
+        :return: A duration in seconds
+        :doc-author: Trelent
+        """
+        results, ordering = find_contacts(contacts, query)
+        results = results.order_by(*ordering)[: settings.LIST_PAGE_SIZE]
+        timings = []
+        for _ in range(repeat):
+            with transaction.atomic():
+                if not use_indexes:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_bitmapscan = off")
+                started = time.perf_counter()
+                list(results.all())
+                timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
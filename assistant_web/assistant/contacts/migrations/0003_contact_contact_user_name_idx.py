@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:01
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "contacts",
+            "0002_contact_created_date_contact_thurname_contact_user_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                models.F("user"),
+                models.F("name"),
+                django.db.models.functions.comparison.Coalesce(
+                    "thurname", models.Value("")
+                ),
+                models.F("id"),
+                name="contact_user_name_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+TRIGRAM_INDEXES = [
+    GinIndex(
+        OpClass(Upper(field), name="gin_trgm_ops"), name=f"contact_{field}_trgm_idx"
+    )
+    for field in ("name", "thurname", "email", "phone", "address")
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    """Trigram indexes are a PostgreSQL feature, other databases search without them."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Contact = apps.get_model("contacts", "Contact")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.add_index(Contact, index)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Contact = apps.get_model("contacts", "Contact")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.remove_index(Contact, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contacts", "0003_contact_contact_user_name_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # Not in the model state: other databases could not create these indexes
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:11
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_birthday_key(apps, schema_editor):
+    """Compute the birthday key of the existing contacts in the database."""
+    Contact = apps.get_model("contacts", "Contact")
+    Contact.objects.filter(birthdate__isnull=False).update(
+        birthday_key=ExtractMonth("birthdate") * 100 + ExtractDay("birthdate")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0004_contact_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="birthday_key",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(fill_birthday_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                fields=["user", "birthday_key"], name="contact_user_birthday_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("contacts", "0005_contact_birthday_key"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="contact",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                default=None,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Fills the birthday key of every inserted or updated contact like contacts.models.birthday_key(),
+# so contacts written by bulk_create, update() or raw SQL are found by upcoming_birthdays too
+BIRTHDAY_KEY_FUNCTION = """
+CREATE OR REPLACE FUNCTION contacts_contact_birthday_key() RETURNS trigger AS $$
+BEGIN
+    NEW.birthday_key :=
+        EXTRACT(MONTH FROM NEW.birthdate) * 100 + EXTRACT(DAY FROM NEW.birthdate);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+BIRTHDAY_KEY_TRIGGER = """
+CREATE TRIGGER contact_birthday_key_trigger
+BEFORE INSERT OR UPDATE ON contacts_contact
+FOR EACH ROW EXECUTE FUNCTION contacts_contact_birthday_key()
+"""
+
+
+def add_birthday_key_trigger(apps, schema_editor):
+    """Compute the birthday keys in the database, PostgreSQL only: elsewhere save() sets them."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(BIRTHDAY_KEY_FUNCTION)
+    schema_editor.execute(BIRTHDAY_KEY_TRIGGER)
+    # Fires the trigger on every contact, including those written without save() so far
+    apps.get_model("contacts", "Contact").objects.update(birthday_key=None)
+
+
+def drop_birthday_key_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS contact_birthday_key_trigger ON contacts_contact"
+    )
+    schema_editor.execute("DROP FUNCTION IF EXISTS contacts_contact_birthday_key()")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contacts", "0006_alter_contact_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_birthday_key_trigger, drop_birthday_key_trigger),
+    ]
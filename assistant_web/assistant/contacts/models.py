@@ -1,7 +1,26 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from phonenumber_field.modelfields import PhoneNumberField
 
+# Columns matched by the contact search, each one has a trigram index
+SEARCH_FIELDS = ("name", "thurname", "email", "phone", "address")
+
+
+def birthday_key(day):
+    """
+    The birthday_key function returns the position of a day in any year as month * 100 + day,
+    e.g. 1231 for the 31st of December, so that birthdays sort and compare regardless of the year.
+    The 29th of February (229) falls between the 28th of February and the 1st of March,
+    so in common years it is listed with the 1st of March.
+
+    :param day: A date
+    :return: An integer
+    :doc-author: Trelent
+    """
+    return day.month * 100 + day.day
+
 
 class Contact(models.Model):
     name = models.CharField(max_length=20, blank=False, null=False)
@@ -10,5 +29,46 @@ class Contact(models.Model):
     phone = PhoneNumberField(blank=True, null=True)
     email = models.EmailField(max_length=50, blank=True, null=True)
     birthdate = models.DateField(blank=True, null=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, default=None, null=False)
+    # Indexed as the first column of the composite indexes in Meta
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, default=None, null=False, db_index=False
+    )
     created_date = models.DateTimeField(auto_now_add=True)
+    # month * 100 + day of the birthdate, see birthday_key(); computed by a trigger
+    # on PostgreSQL (migration 0007), so bulk writes keep it too, and by save() elsewhere
+    birthday_key = models.PositiveSmallIntegerField(
+        blank=True, null=True, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            # Serves the contact list ordering, see contacts.views.CONTACT_ORDERING
+            models.Index(
+                F("user"),
+                F("name"),
+                Coalesce("thurname", Value("")),
+                F("id"),
+                name="contact_user_name_idx",
+            ),
+            # Serves the upcoming birthdays range, see contacts.views.upcoming_birthdays
+            models.Index(
+                fields=["user", "birthday_key"], name="contact_user_birthday_idx"
+            ),
+        ]
+        # The trigram indexes serving the UPPER(column) LIKE '%...%' of icontains are created
+        # by migration 0004 on PostgreSQL only and kept out of the model state, so other
+        # databases never try to build them, see contacts.views.find_contacts
+
+    def save(self, *args, **kwargs):
+        """
+        The save function saves the contact and keeps its birthday_key in sync with the birthdate.
+
+        :param self: Represent the instance of the class
+        :return: None
+        :doc-author: Trelent
+        """
+        self.birthday_key = birthday_key(self.birthdate) if self.birthdate else None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "birthdate" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "birthday_key"}
+        super().save(*args, **kwargs)
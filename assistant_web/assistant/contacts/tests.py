@@ -1,3 +1,103 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Contact
+from .views import birthdays_within
+
+BIRTHDATES = {
+    "Jan1": date(1990, 1, 1),
+    "Jan2": date(1985, 1, 2),
+    "Feb28": date(1991, 2, 28),
+    "Feb29": date(1992, 2, 29),
+    "Mar1": date(1993, 3, 1),
+    "Jun15": date(2000, 6, 15),
+    "Dec30": date(1980, 12, 30),
+    "Dec31": date(1981, 12, 31),
+}
+
+
+def next_birthday(birthdate, today):
+    """The next birthday from today, the 29th of February is celebrated on the 1st of March in common years."""
+    for year in (today.year, today.year + 1):
+        try:
+            day = birthdate.replace(year=year)
+        except ValueError:
+            day = date(year, 3, 1)
+        if day >= today:
+            return day
+
+
+class UpcomingBirthdaysTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("birthdays")
+        # bulk_create does not call save(), the birthday keys come from the database
+        Contact.objects.bulk_create(
+            Contact(user=cls.user, name=name, birthdate=birthdate)
+            for name, birthdate in BIRTHDATES.items()
+        )
+        Contact.objects.create(user=cls.user, name="Unknown")
+
+    def within(self, today, days):
+        contacts = birthdays_within(Contact.objects.filter(user=self.user), today, days)
+        return [contact.name for contact in contacts]
+
+    def expected(self, today, days):
+        upcoming = []
+        for name, birthdate in BIRTHDATES.items():
+            day = next_birthday(birthdate, today)
+            if (day - today).days <= days:
+                upcoming.append((day, birthdate.month, birthdate.day, name))
+        return [name for *_, name in sorted(upcoming)]
+
+    def test_window_matches_the_calendar(self):
+        for today in (
+            date(2023, 1, 1),
+            date(2023, 2, 27),
+            date(2023, 2, 28),
+            date(2023, 3, 1),
+            date(2024, 2, 28),
+            date(2024, 2, 29),
+            date(2024, 3, 1),
+            date(2023, 12, 25),
+            date(2023, 12, 31),
+            date(2024, 12, 31),
+        ):
+            for days in (0, 1, 2, 7, 30, 364, 365, 366):
+                with self.subTest(today=today, days=days):
+                    self.assertEqual(
+                        self.within(today, days), self.expected(today, days)
+                    )
+
+    def test_window_wraps_around_the_new_year(self):
+        self.assertEqual(
+            self.within(date(2023, 12, 30), 3), ["Dec30", "Dec31", "Jan1", "Jan2"]
+        )
+
+    def test_february_29th_is_celebrated_on_march_1st_in_common_years(self):
+        self.assertEqual(self.within(date(2023, 2, 28), 1), ["Feb28", "Feb29", "Mar1"])
+        self.assertEqual(self.within(date(2023, 3, 1), 0), ["Feb29", "Mar1"])
+        self.assertEqual(self.within(date(2024, 3, 1), 0), ["Mar1"])
+        self.assertEqual(self.within(date(2024, 2, 29), 0), ["Feb29"])
+
+    def test_a_year_or_more_lists_every_birthday(self):
+        self.assertEqual(len(self.within(date(2023, 6, 16), 365)), len(BIRTHDATES))
+        self.assertEqual(self.within(date(2023, 6, 16), 365)[-1], "Jun15")
+
+    def test_birthday_key_follows_bulk_updates(self):
+        Contact.objects.filter(user=self.user, name="Jun15").update(
+            birthdate=date(2000, 7, 4)
+        )
+        self.assertEqual(Contact.objects.get(name="Jun15").birthday_key, 704)
+        self.assertEqual(self.within(date(2023, 7, 1), 5), ["Jun15"])
 
-# Create your tests here.
+    def test_days_parameter_is_bounded(self):
+        self.client.force_login(self.user)
+        url = reverse("contacts:upcoming_birthdays")
+        for days, expected in (("-3", 0), ("1000", 366), ("x", 7), ("30", 30)):
+            with self.subTest(days=days), self.settings(BIRTHDAYS_WINDOW_DAYS=7):
+                response = self.client.get(url, {"days": days})
+                self.assertEqual(response.context["days"], expected)
@@ -9,5 +9,6 @@ urlpatterns = [
     path("<int:contact_id>/edit/", views.edit_contact, name="edit_contact"),
     path("<int:contact_id>/delete/", views.delete_contact, name="delete_contact"),
     path("search/", views.search_contacts, name="search_contacts"),
+    path("api/search/", views.search_contacts_api, name="search_contacts_api"),
     path("upcoming_birthdays/", views.upcoming_birthdays, name="upcoming_birthdays"),
 ]
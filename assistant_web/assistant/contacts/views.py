@@ -1,11 +1,61 @@
-from datetime import date
+from datetime import date, timedelta
+
+from django.conf import settings
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 
+from assistant.pagination import paginate_keyset
 from .forms import ContactForm
-from .models import Contact
+from .models import SEARCH_FIELDS, Contact, birthday_key
+
+# Contacts are sorted by name and family name, the key ends with the pk to be unique
+CONTACT_ORDERING = ("name", "thurname_key", "pk")
+
+
+def user_contacts(user):
+    """
+    The user_contacts function returns the contacts of a user, ready for keyset pagination.
+    An empty family name is sorted as "", the same expression is indexed in Contact.Meta.
+
+    :param user: The owner of the contacts
+    :return: A queryset of contacts
+    :doc-author: Trelent
+    """
+    return Contact.objects.filter(user=user).annotate(
+        thurname_key=Coalesce("thurname", Value(""))
+    )
+
+
+def find_contacts(contacts, query):
+    """
+    The find_contacts function finds the contacts whose name, family name, email, phone or address
+    contain the query, ignoring case.
+    On PostgreSQL every column is matched through its trigram index and the contacts are ranked
+    by their best word similarity to the query; on other databases they keep the list ordering.
+
+    :param contacts: A queryset of contacts
+    :param query: The searched text
+    :return: A tuple of the matching contacts and their keyset ordering
+    :doc-author: Trelent
+    """
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__icontains": query})
+    contacts = contacts.filter(matches)
+    if connection.vendor != "postgresql":
+        return contacts, CONTACT_ORDERING
+    similarity = Greatest(
+        *(TrigramWordSimilarity(query, field) for field in SEARCH_FIELDS)
+    )
+    # word_similarity is a real, a double makes the value in the cursor round-trip
+    contacts = contacts.annotate(similarity=Cast(similarity, FloatField()))
+    return contacts, ("-similarity", "pk")
 
 
 @login_required
@@ -18,7 +68,7 @@ def contact_list(request):
     :return: A rendered template
     :doc-author: Trelent
     """
-    contacts = Contact.objects.filter(user=request.user).order_by("name", "thurname")
+    contacts = paginate_keyset(request, user_contacts(request.user), CONTACT_ORDERING)
     return render(request, "contacts/contact_list.html", {"contacts": contacts})
 
 
@@ -94,7 +144,7 @@ def delete_contact(request, contact_id):
 @login_required
 def search_contacts(request):
     """
-    The search_contacts function is a view that allows users to search for contacts by name, email or phone number.
+    The search_contacts function is a view that allows users to search for contacts by name, email, phone or address.
     The function takes in the request object and returns a rendered template with the results of the query.
 
     :param request: Get the current request object
@@ -102,45 +152,101 @@ def search_contacts(request):
     :doc-author: Trelent
     """
     query = request.GET.get("q")
+    contacts, ordering = user_contacts(request.user), CONTACT_ORDERING
     if query:
-        contacts = Contact.objects.filter(
-            Q(name__icontains=query)
-            | Q(email__icontains=query)
-            | Q(phone__icontains=query),
-            user=request.user,
-        ).order_by("name", "thurname")
-    else:
-        contacts = Contact.objects.filter(user=request.user).order_by(
-            "name", "thurname"
-        )
+        contacts, ordering = find_contacts(contacts, query)
+    contacts = paginate_keyset(request, contacts, ordering)
     return render(
         request, "contacts/contact_list.html", {"contacts": contacts, "query": query}
     )
 
 
+@login_required
+def search_contacts_api(request):
+    """
+    The search_contacts_api function is the JSON version of search_contacts.
+    The next page is requested by passing the returned cursor as the cursor query parameter.
+
+    :param request: Get the q and cursor query parameters
+    :return: A jsonresponse object with the results and the cursor of the next page
+    :doc-author: Trelent
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"results": [], "next_cursor": None})
+    contacts, ordering = find_contacts(user_contacts(request.user), query)
+    page = paginate_keyset(request, contacts, ordering)
+    results = [
+        {
+            "id": contact.pk,
+            "name": contact.name,
+            "thurname": contact.thurname,
+            "email": contact.email,
+            "phone": str(contact.phone) if contact.phone else None,
+            "address": contact.address,
+            "birthdate": contact.birthdate,
+            "similarity": getattr(contact, "similarity", None),
+        }
+        for contact in page
+    ]
+    return JsonResponse({"results": results, "next_cursor": page.next_cursor})
+
+
+def birthdays_within(contacts, today, days):
+    """
+    The birthdays_within function selects the contacts whose birthday is within days from today,
+    sorted by the date of their next birthday.
+    Birthdays are compared by their stored birthday_key, so this is a single range query on the
+    (user, birthday_key) index; when the window crosses the new year the range wraps around.
+
+    :param contacts: A queryset of contacts
+    :param today: The first day of the window
+    :param days: The length of the window in days
+    :return: A queryset of contacts
+    :doc-author: Trelent
+    """
+    # The day after yesterday: in a common year the 1st of March also starts at 229
+    start = birthday_key(today - timedelta(days=1)) + 1
+    end = birthday_key(today + timedelta(days=days))
+
+    if days >= 365:
+        contacts = contacts.filter(birthday_key__isnull=False)
+    elif start <= end:
+        contacts = contacts.filter(birthday_key__range=(start, end))
+    else:
+        contacts = contacts.filter(
+            Q(birthday_key__gte=start) | Q(birthday_key__lte=end)
+        )
+    contacts = contacts.order_by(
+        Case(When(birthday_key__lt=start, then=Value(1)), default=Value(0)),
+        "birthday_key",
+        "name",
+    )
+    return contacts
+
+
 @login_required
 def upcoming_birthdays(request):
     """
-    The upcoming_birthdays function takes a request and returns a list of contacts whose birthdays are within the next 7 days.
-    The function first gets today's date, then it gets all the contacts that have birthdates and belong to the current user.
-    It then loops through each contact, getting their birthday this year (or next year if their birthday has already passed).
-    Then it calculates how many days until their birthday is from today's date. If there are less than or equal to 7 days left until
-    their birthday, they get added to our result list.
+    The upcoming_birthdays function takes a request and returns a list of contacts whose birthdays are
+    within the next days (BIRTHDAYS_WINDOW_DAYS by default, the days query parameter overrides it),
+    see birthdays_within.
 
     :param request: Pass the request object to the view
-    :return: The contacts that have a birthday in the next 7 days
+    :return: The contacts that have a birthday in the next days
     :doc-author: Trelent
     """
-    today = date.today()
-    contacts = Contact.objects.filter(birthdate__isnull=False, user=request.user)
-
-    result = []
-    for contact in contacts:
-        date_of_birth = contact.birthdate
-        date_this_year = date_of_birth.replace(year=today.year)
-        if date_this_year < today:
-            date_this_year = date_this_year.replace(year=today.year + 1)
-        days_to_birthday = (date_this_year - today).days
-        if days_to_birthday <= 7:
-            result.append(contact)
-    return render(request, "contacts/upcoming_birthdays.html", {"contacts": result})
+    try:
+        days = int(request.GET.get("days", settings.BIRTHDAYS_WINDOW_DAYS))
+    except ValueError:
+        days = settings.BIRTHDAYS_WINDOW_DAYS
+    days = min(max(days, 0), 366)
+
+    contacts = birthdays_within(
+        Contact.objects.filter(user=request.user), date.today(), days
+    )
+    return render(
+        request,
+        "contacts/upcoming_birthdays.html",
+        {"contacts": contacts, "days": days},
+    )
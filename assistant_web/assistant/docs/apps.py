@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DocsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "docs"
+
+    def ready(self):
+        # Connects the signal that releases the blobs of deleted files
+        from . import blobs  # noqa: F401
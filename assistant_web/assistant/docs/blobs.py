@@ -0,0 +1,151 @@
+import logging
+
+from django.core.files import File as ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Blob, File
+
+logger = logging.getLogger(__name__)
+
+
+def blob_name(sha256):
+    return f"{sha256[:2]}/{sha256}"
+
+
+def add_reference(blobs):
+    """
+    The add_reference function adds a reference to the first blob of a queryset, if any.
+
+    :param blobs: A queryset of blobs
+    :return: The blob or None
+    :doc-author: Trelent
+    """
+    with transaction.atomic():
+        blob = blobs.select_for_update().first()
+        if blob is not None:
+            blob.ref_count = F("ref_count") + 1
+            blob.save(update_fields=["ref_count"])
+            blob.refresh_from_db(fields=["ref_count"])
+    return blob
+
+
+def reference_blob(sha256):
+    """
+    The reference_blob function adds a reference to the stored content with a checksum, if any.
+
+    :param sha256: The hex sha256 digest of the content
+    :return: The blob or None
+    :doc-author: Trelent
+    """
+    if not sha256:
+        return None
+    return add_reference(Blob.objects.filter(sha256=sha256))
+
+
+def register_blob(name, sha256, size):
+    """
+    The register_blob function records a content just stored under name with one reference.
+    If the same content was registered meanwhile, that blob is referenced and the copy is deleted.
+
+    :param name: The name of the stored object
+    :param sha256: The hex sha256 digest of the content, empty if unknown
+    :param size: The size of the content in bytes
+    :return: The blob
+    :doc-author: Trelent
+    """
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(
+                file=name, sha256=sha256 or None, size=size, ref_count=1
+            )
+    except IntegrityError:
+        blob = reference_blob(sha256)
+        if blob is None:
+            raise
+        if blob.file.name != name:
+            default_storage.delete(name)
+        return blob
+
+
+def store_blob(content, metadata):
+    """
+    The store_blob function returns the blob of a content, with a new reference.
+    The content is only uploaded to S3 when no blob has the same checksum, under a name
+    derived from that checksum.
+
+    :param content: A seekable file object with the content
+    :param metadata: The metadata of the content, see docs.metadata.extract_metadata
+    :return: The blob
+    :doc-author: Trelent
+    """
+    blob = reference_blob(metadata["sha256"])
+    if blob is not None:
+        return blob
+    content.seek(0)
+    stored = ContentFile(content, name=blob_name(metadata["sha256"]))
+    # Sent to S3 as the Content-Type of the object
+    stored.content_type = metadata["mime_type"]
+    blob = Blob(sha256=metadata["sha256"], size=metadata["size"])
+    blob.file.save(stored.name, stored, save=False)
+    return register_blob(blob.file.name, metadata["sha256"], metadata["size"])
+
+
+def adopt_blob(name, metadata):
+    """
+    The adopt_blob function returns the blob of an object uploaded straight to S3, with a new reference.
+    If the same content is stored already, the uploaded copy is deleted, unless it is the object
+    of that blob, e.g. registered by a concurrent completion of the same upload.
+
+    :param name: The name of the uploaded object
+    :param metadata: The metadata of the object, see docs.presign.uploaded_metadata
+    :return: The blob
+    :doc-author: Trelent
+    """
+    blob = reference_blob(metadata["sha256"])
+    if blob is None:
+        return register_blob(name, metadata["sha256"], metadata["size"])
+    if blob.file.name != name:
+        default_storage.delete(name)
+    return blob
+
+
+def release_blob(blob_id):
+    """
+    The release_blob function removes a reference to a blob. The last one deletes the blob
+    and, once the transaction is committed, its S3 object and preview.
+
+    :param blob_id: The primary key of the blob
+    :return: None
+    :doc-author: Trelent
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            blob.ref_count = F("ref_count") - 1
+            blob.save(update_fields=["ref_count"])
+            return
+        names = [blob.file.name, blob.preview.name]
+        blob.delete()
+        for name in filter(None, names):
+            transaction.on_commit(lambda name=name: delete_object(name))
+
+
+def delete_object(name):
+    # The records are deleted already, a failure leaves an orphaned object behind
+    try:
+        default_storage.delete(name)
+    except Exception:
+        logger.exception("Deleting %s from the storage failed", name)
+
+
+@receiver(post_delete, sender=File)
+def release_deleted_file(sender, instance, **kwargs):
+    # Also runs for the files deleted with their user
+    if instance.blob_id:
+        release_blob(instance.blob_id)
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import boto3
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+
+class FakeS3:
+    """
+    A local S3 endpoint served by moto, so uploads can be tried and benchmarked offline.
+    Every request is delayed by latency seconds to simulate a network round-trip,
+    the objects are kept in memory until the server stops.
+    While it runs, the default storage writes to its bucket.
+    moto is a development dependency: pip install "moto[server]".
+    """
+
+    def __init__(self, latency=0.0, bucket="assistant-fake", host="127.0.0.1", port=0):
+        try:
+            from moto.server import DomainDispatcherApplication, create_backend_app
+            from werkzeug.serving import WSGIRequestHandler, make_server
+        except ImportError:
+            raise ImproperlyConfigured(
+                'The fake S3 needs moto, install it with pip install "moto[server]"'
+            )
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.latency = latency
+        self.bucket = bucket
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+        self.app = DomainDispatcherApplication(create_backend_app)
+        self.httpd = make_server(
+            host, port, self._delayed, threaded=True, request_handler=QuietHandler
+        )
+        self._thread = None
+        self._overrides = None
+
+    def _delayed(self, environ, start_response):
+        with self._counter_lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        return self.app(environ, start_response)
+
+    @property
+    def endpoint_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def client(self):
+        return boto3.client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name="us-east-1",
+            aws_access_key_id="fake",
+            aws_secret_access_key="fake",
+        )
+
+    def storage_settings(self):
+        """
+        The storage_settings function returns the settings that point S3Boto3Storage to the fake.
+        DEFAULT_FILE_STORAGE is overridden with its own value, so the default storage is recreated.
+
+        :return: A dictionary of settings
+        :doc-author: Trelent
+        """
+        return {
+            "DEFAULT_FILE_STORAGE": settings.DEFAULT_FILE_STORAGE,
+            "AWS_S3_ENDPOINT_URL": self.endpoint_url,
+            "AWS_S3_ADDRESSING_STYLE": "path",
+            "AWS_S3_CUSTOM_DOMAIN": None,
+            "AWS_S3_REGION_NAME": "us-east-1",
+            "AWS_STORAGE_BUCKET_NAME": self.bucket,
+            "AWS_ACCESS_KEY_ID": "fake",
+            "AWS_SECRET_ACCESS_KEY": "fake",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        self.client().create_bucket(Bucket=self.bucket)
+        self._overrides = override_settings(**self.storage_settings())
+        self._overrides.enable()
+        return self
+
+    def stop(self):
+        self._overrides.disable()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
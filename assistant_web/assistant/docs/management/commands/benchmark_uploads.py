@@ -0,0 +1,135 @@
+import os
+import time
+
+from boto3.s3.transfer import TransferConfig
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from docs.fake_s3 import FakeS3
+from docs.models import Upload
+from docs.transfer import transfer_upload
+
+BENCHMARK_USER = "benchmark_uploads"
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a synthetic file through the chunked upload endpoints and transfer it "
+        "to a local fake S3, with sequential and parallel multipart parts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=64,
+            help="Size of the synthetic file in MB",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.1,
+            help="Delay of every request to the fake S3 in seconds",
+        )
+
+    def handle(self, *args, **options):
+        size = options["size"] * 1024 * 1024
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USER)
+        client = Client()
+        client.force_login(user)
+        with FakeS3(latency=options["latency"]) as s3, override_settings(
+            UPLOAD_TRANSFER_WORKERS=0
+        ):
+            try:
+                config = settings.AWS_S3_TRANSFER_CONFIG
+                for label, concurrency in (
+                    ("sequential", 1),
+                    ("parallel", config.max_concurrency),
+                ):
+                    # New content every run, a repeated one would not be sent to S3 again
+                    payload = os.urandom(size)
+                    upload_id = self.send(client, payload)
+                    with override_settings(
+                        DEFAULT_FILE_STORAGE=settings.DEFAULT_FILE_STORAGE,
+                        AWS_S3_TRANSFER_CONFIG=TransferConfig(
+                            multipart_threshold=config.multipart_threshold,
+                            multipart_chunksize=config.multipart_chunksize,
+                            max_concurrency=concurrency,
+                        ),
+                    ):
+                        started = time.perf_counter()
+                        file_instance = transfer_upload(upload_id)
+                        elapsed = time.perf_counter() - started
+                    stored = s3.client().get_object(
+                        Bucket=s3.bucket, Key=file_instance.file.name
+                    )
+                    if stored["Body"].read() != payload:
+                        raise CommandError("The transferred file differs")
+                    parts = stored["ETag"].strip('"').partition("-")[2] or "1"
+                    self.stdout.write(
+                        f"{label:>11}: transferred in {elapsed:.2f}s, "
+                        f"{parts} part(s), {concurrency} at a time"
+                    )
+
+                upload_id = self.send(client, payload)
+                s3.requests = 0
+                started = time.perf_counter()
+                copy = transfer_upload(upload_id)
+                if copy.blob_id != file_instance.blob_id:
+                    raise CommandError("The repeated file was stored again")
+                self.stdout.write(
+                    f"{'repeated':>11}: stored in {time.perf_counter() - started:.2f}s, "
+                    f"{s3.requests} requests to S3"
+                )
+            finally:
+                # Deleting the user deletes its objects, while the fake S3 still runs
+                for upload in Upload.objects.filter(user=user):
+                    if os.path.exists(upload.staged_path):
+                        os.remove(upload.staged_path)
+                user.delete()
+
+    def send(self, client, payload):
+        """
+        The send function uploads the payload in UPLOAD_CHUNK_SIZE chunks; the first chunk
+        is sent twice to check that a repeated chunk is refused with the offset to resume from.
+
+        :param client: A logged-in test client
+        :param payload: The content of the file
+        :return: The id of the received upload
+        :doc-author: Trelent
+        """
+        size = len(payload)
+        response = client.post(
+            reverse("docs:start_upload"), {"filename": "benchmark.bin", "size": size}
+        )
+        state = response.json()
+        chunk_size = state["chunk_size"]
+        started = time.perf_counter()
+        offsets = [0] + list(range(0, size, chunk_size))
+        for n, offset in enumerate(offsets):
+            chunk = payload[offset : offset + chunk_size]
+            response = client.post(
+                state["chunk_url"],
+                chunk,
+                content_type="application/octet-stream",
+                headers={
+                    "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}"
+                },
+            )
+            if n == 1 and (
+                response.status_code != 409 or response.json()["received"] != len(chunk)
+            ):
+                raise CommandError("A repeated chunk was not refused")
+            if n != 1 and response.status_code != 200:
+                raise CommandError(f"Chunk at {offset} failed: {response.content}")
+        state = client.get(state["status_url"]).json()
+        if state["status"] != "queued" or state["received"] != size:
+            raise CommandError(f"Unexpected upload state {state}")
+        self.stdout.write(
+            f"   received: {size // (1024 * 1024)} MB in {len(offsets) - 1} chunks "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return state["id"]
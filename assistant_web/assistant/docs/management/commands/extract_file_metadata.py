@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from docs.metadata import MetadataExtractor
+from docs.models import Blob, File
+
+
+class Command(BaseCommand):
+    help = (
+        "Read the files uploaded before their metadata was extracted "
+        "and store their size, type, image size and checksum"
+    )
+
+    def handle(self, *args, **options):
+        updated = failed = 0
+        for file_instance in File.objects.filter(sha256="").iterator():
+            extractor = MetadataExtractor(file_instance.file.name)
+            try:
+                with file_instance.file.open("rb") as content:
+                    for chunk in content.chunks():
+                        extractor.feed(chunk)
+            except Exception as e:
+                self.stderr.write(f"{file_instance.file.name}: {e}")
+                failed += 1
+                continue
+            file_instance.apply_metadata(extractor.metadata())
+            file_instance.save(
+                update_fields=[
+                    "size",
+                    "mime_type",
+                    "category",
+                    "width",
+                    "height",
+                    "sha256",
+                ]
+            )
+            # Older blobs get a checksum too, unless a blob has the same content
+            if not Blob.objects.filter(sha256=file_instance.sha256).exists():
+                Blob.objects.filter(
+                    pk=file_instance.blob_id, sha256__isnull=True
+                ).update(sha256=file_instance.sha256, size=file_instance.size)
+            updated += 1
+        self.stdout.write(f"Updated {updated} files, {failed} failed")
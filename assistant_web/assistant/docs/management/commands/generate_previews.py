@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from docs.models import Blob, File
+from docs.previews import generate_preview, previewable, requeue_stale_previews
+
+
+class Command(BaseCommand):
+    help = "Render the pending previews of images and PDFs, and retry the failed ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and look for previews every N seconds",
+        )
+        parser.add_argument(
+            "--stale",
+            type=int,
+            default=600,
+            help="Seconds after which an unfinished preview is started again",
+        )
+        parser.add_argument(
+            "--retry",
+            action="store_true",
+            help="Render the failed previews again",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Request the previews of files uploaded before they were rendered "
+            "or before Pillow or pdftoppm was installed",
+        )
+
+    def handle(self, *args, **options):
+        if options["missing"]:
+            self.stdout.write(f"Requested {self.request_missing()} previews")
+        if options["retry"]:
+            Blob.objects.filter(preview_status="failed").update(
+                preview_status="pending"
+            )
+        while True:
+            self.generate_pending(options["stale"])
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+
+    def request_missing(self):
+        """
+        The request_missing function marks the blobs without a preview as pending
+        when one of their files can be previewed.
+
+        :return: The number of requested previews
+        :doc-author: Trelent
+        """
+        requested = 0
+        files = File.objects.filter(blob__preview_status="none").values_list(
+            "blob_id", "mime_type", "size"
+        )
+        for blob_id, mime_type, size in files.iterator():
+            if previewable(mime_type, size):
+                requested += Blob.objects.filter(
+                    pk=blob_id, preview_status="none"
+                ).update(preview_status="pending", preview_updated=timezone.now())
+        return requested
+
+    def generate_pending(self, stale):
+        """
+        The generate_pending function renders the pending previews one after another.
+        A preview that did not finish within stale seconds is queued again first.
+
+        :param stale: The age in seconds of an unfinished preview
+        :return: None
+        :doc-author: Trelent
+        """
+        requeue_stale_previews(stale)
+        pending = Blob.objects.filter(preview_status="pending")
+        for blob_id in pending.order_by("preview_updated").values_list("pk", flat=True):
+            started = time.perf_counter()
+            try:
+                name = generate_preview(blob_id)
+            except Exception as e:
+                self.stderr.write(f"Preview of blob {blob_id} failed: {e}")
+                continue
+            if name is not None:
+                self.stdout.write(
+                    f"Rendered {name} in {time.perf_counter() - started:.1f}s"
+                )
@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from docs.models import Upload
+from docs.transfer import expire_uploads, transfer_upload
+
+
+class Command(BaseCommand):
+    help = (
+        "Transfer the received uploads to S3, retry the failed ones "
+        "and delete the abandoned ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and look for uploads every N seconds",
+        )
+        parser.add_argument(
+            "--stale",
+            type=int,
+            default=3600,
+            help="Seconds after which an unfinished transfer is started again",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.transfer_pending(options["stale"])
+            deleted = expire_uploads()
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} abandoned uploads")
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+
+    def transfer_pending(self, stale):
+        """
+        The transfer_pending function transfers the queued and failed uploads one after another.
+        A transfer that did not finish within stale seconds, e.g. because its worker was stopped,
+        is queued again first.
+
+        :param stale: The age in seconds of an unfinished transfer
+        :return: None
+        :doc-author: Trelent
+        """
+        Upload.objects.filter(
+            status="transferring",
+            updated__lt=timezone.now() - timedelta(seconds=stale),
+        ).update(status="queued")
+
+        pending = Upload.objects.filter(status__in=("queued", "failed"))
+        for upload_id in pending.order_by("updated").values_list("pk", flat=True):
+            started = time.perf_counter()
+            try:
+                file_instance = transfer_upload(upload_id)
+            except Exception as e:
+                self.stderr.write(f"Transfer of upload {upload_id} failed: {e}")
+                continue
+            if file_instance is not None:
+                self.stdout.write(
+                    f"Transferred {file_instance.file.name} "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
@@ -0,0 +1,292 @@
+import hashlib
+import mimetypes
+import os
+import struct
+
+# Bytes kept from the start of a file to recognize its type and read the image size
+HEAD_SIZE = 256 * 1024
+
+IMAGE_EXTENSIONS = frozenset(
+    ["jpg", "jpeg", "png", "bmp", "gif", "svg", "tiff", "webp"]
+)
+DOCUMENT_EXTENSIONS = frozenset(
+    ["pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "ods", "txt"]
+)
+VIDEO_EXTENSIONS = frozenset(["mp4", "mkv", "flv", "avi", "mov", "wmv"])
+AUDIO_EXTENSIONS = frozenset(["mp3", "wav", "ogg", "m4a", "aac", "flac"])
+ARCHIVE_EXTENSIONS = frozenset(["zip", "rar", "7z", "tar", "gz"])
+
+EXTENSION_CATEGORIES = {
+    extension: category
+    for category, extensions in (
+        ("image", IMAGE_EXTENSIONS),
+        ("document", DOCUMENT_EXTENSIONS),
+        ("video", VIDEO_EXTENSIONS),
+        ("audio", AUDIO_EXTENSIONS),
+        ("archive", ARCHIVE_EXTENSIONS),
+    )
+    for extension in extensions
+}
+
+# Office documents are zip or OLE2 containers, they are told apart by their extension
+CONTAINER_DOCUMENTS = frozenset(
+    ["doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "ods"]
+)
+
+# (offset, signature, mime type), checked in order
+MAGIC_NUMBERS = [
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"PK\x05\x06", "application/zip"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (257, b"ustar", "application/x-tar"),
+    (0, b"\x1a\x45\xdf\xa3", "video/x-matroska"),
+    (0, b"FLV\x01", "video/x-flv"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "video/x-ms-wmv"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"\xff\xfb", "audio/mpeg"),
+    (0, b"\xff\xf3", "audio/mpeg"),
+    (0, b"\xff\xf1", "audio/aac"),
+    (0, b"\xff\xf9", "audio/aac"),
+]
+
+RIFF_TYPES = {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/x-msvideo"}
+
+# Brands of ISO media files (mp4, mov, m4a, ...) that are not videos
+FTYP_BRANDS = {
+    b"M4A ": "audio/mp4",
+    b"M4B ": "audio/mp4",
+    b"qt  ": "video/quicktime",
+    b"avif": "image/avif",
+    b"heic": "image/heic",
+    b"mif1": "image/heif",
+}
+
+MIME_CATEGORIES = {
+    "application/pdf": "document",
+    "application/x-ole-storage": "document",
+    "application/zip": "archive",
+    "application/vnd.rar": "archive",
+    "application/x-7z-compressed": "archive",
+    "application/gzip": "archive",
+    "application/x-tar": "archive",
+}
+
+# Sizes of the bitmap headers that follow the file header of a BMP
+BMP_HEADER_SIZES = frozenset(
+    size.to_bytes(4, "little") for size in (12, 40, 52, 56, 64, 108, 124)
+)
+
+# Start of frame markers of JPEG, they carry the image size
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def file_extension(filename):
+    return os.path.splitext(filename)[1].lstrip(".").lower()
+
+
+def category_for_extension(filename):
+    """
+    The category_for_extension function returns the category of a file from its extension alone.
+
+    :param filename: The name of the file
+    :return: A category of File.CATEGORY_CHOICES
+    :doc-author: Trelent
+    """
+    return EXTENSION_CATEGORIES.get(file_extension(filename), "other")
+
+
+def sniff_mime_type(head, filename):
+    """
+    The sniff_mime_type function recognizes the type of a file from its first bytes.
+    Containers shared by several formats are refined with the extension, and files without
+    a known signature get the type of their extension.
+
+    :param head: The first bytes of the file, see HEAD_SIZE
+    :param filename: The name of the file
+    :return: A mime type
+    :doc-author: Trelent
+    """
+    extension = file_extension(filename)
+    mime_type = None
+    for offset, signature, signature_type in MAGIC_NUMBERS:
+        if head.startswith(signature, offset):
+            mime_type = signature_type
+            break
+    else:
+        if head[:4] == b"RIFF":
+            mime_type = RIFF_TYPES.get(head[8:12])
+        elif head[4:8] == b"ftyp":
+            mime_type = FTYP_BRANDS.get(head[8:12], "video/mp4")
+
+    if mime_type == "image/bmp" and head[14:18] not in BMP_HEADER_SIZES:
+        # Plain text may start with "BM" as well
+        mime_type = None
+    if mime_type in ("application/zip", "application/x-ole-storage"):
+        if extension in CONTAINER_DOCUMENTS:
+            mime_type = mimetypes.guess_type(filename)[0] or mime_type
+    if mime_type is None and b"\x00" not in head[:8192]:
+        if b"<svg" in head[:4096].lower():
+            mime_type = "image/svg+xml"
+    return mime_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def category_for_mime_type(mime_type, filename):
+    """
+    The category_for_mime_type function returns the category of a file of a sniffed mime type,
+    falling back to its extension.
+
+    :param mime_type: The mime type of the file
+    :param filename: The name of the file
+    :return: A category of File.CATEGORY_CHOICES
+    :doc-author: Trelent
+    """
+    category = MIME_CATEGORIES.get(mime_type)
+    if category:
+        return category
+    major = mime_type.partition("/")[0]
+    if major in ("image", "video", "audio"):
+        return major
+    if mime_type.startswith(
+        ("application/vnd.openxmlformats", "application/vnd.oasis")
+    ):
+        return "document"
+    if mime_type.startswith(("application/msword", "application/vnd.ms-")):
+        return "document"
+    return category_for_extension(filename)
+
+
+def image_size(head, mime_type):
+    """
+    The image_size function reads the width and height of a png, gif, bmp, webp or jpeg image
+    from its first bytes.
+
+    :param head: The first bytes of the image
+    :param mime_type: The sniffed mime type
+    :return: A (width, height) tuple, (None, None) if unknown
+    :doc-author: Trelent
+    """
+    try:
+        if mime_type == "image/png" and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if mime_type == "image/gif":
+            return struct.unpack("<HH", head[6:10])
+        if mime_type == "image/bmp":
+            width, height = struct.unpack("<ii", head[18:26])
+            return width, abs(height)
+        if mime_type == "image/webp":
+            return webp_size(head)
+        if mime_type == "image/jpeg":
+            return jpeg_size(head)
+    except struct.error:
+        pass
+    return None, None
+
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    return None, None
+
+
+def jpeg_size(head):
+    # Walk the segments up to the first start of frame
+    position = 2
+    while position + 9 <= len(head):
+        if head[position] != 0xFF:
+            break
+        marker = head[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", head[position + 5 : position + 9])
+            return width, height
+        (length,) = struct.unpack(">H", head[position + 2 : position + 4])
+        position += 2 + length
+    return None, None
+
+
+def describe(head, filename):
+    """
+    The describe function returns what is known of a file from its first bytes.
+
+    :param head: The first bytes of the file, see HEAD_SIZE
+    :param filename: The name of the file
+    :return: A dictionary with the mime_type, category, width and height
+    :doc-author: Trelent
+    """
+    mime_type = sniff_mime_type(head, filename)
+    width, height = image_size(head, mime_type)
+    return {
+        "mime_type": mime_type,
+        "category": category_for_mime_type(mime_type, filename),
+        "width": width,
+        "height": height,
+    }
+
+
+class MetadataExtractor:
+    """
+    Collects the size, sha256 checksum and first bytes of a file fed to it in order,
+    so its metadata is extracted in a single pass over the file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._head = bytearray()
+
+    def feed(self, data):
+        self.size += len(data)
+        self._sha256.update(data)
+        if len(self._head) < HEAD_SIZE:
+            self._head += data[: HEAD_SIZE - len(self._head)]
+
+    def metadata(self):
+        metadata = describe(bytes(self._head), self.filename)
+        metadata["size"] = self.size
+        metadata["sha256"] = self._sha256.hexdigest()
+        return metadata
+
+
+def extract_metadata(content, filename):
+    """
+    The extract_metadata function reads a file once and returns its metadata,
+    the checksum is needed before the file is uploaded to find a stored copy of it.
+
+    :param content: A file object with the content
+    :param filename: The name of the file
+    :return: A dictionary with the size, mime_type, category, width, height and sha256
+    :doc-author: Trelent
+    """
+    extractor = MetadataExtractor(filename)
+    content.seek(0)
+    while True:
+        data = content.read(1024 * 1024)
+        if not data:
+            break
+        extractor.feed(data)
+    return extractor.metadata()
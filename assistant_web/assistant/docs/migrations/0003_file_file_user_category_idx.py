@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("docs", "0002_file_file_user_upload_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="file",
+            index=models.Index(
+                fields=["user", "category"], name="file_user_category_idx"
+            ),
+        ),
+    ]
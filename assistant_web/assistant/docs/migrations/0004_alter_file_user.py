@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("docs", "0003_file_file_user_category_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="file",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
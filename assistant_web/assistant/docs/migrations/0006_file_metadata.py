@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("docs", "0005_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="mime_type",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="sha256",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="size",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="file",
+            index=models.Index(
+                fields=["user", "size", "id"], name="file_user_size_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="file",
+            index=models.Index(fields=["sha256"], name="file_sha256_idx"),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max
+
+
+def create_blobs(apps, schema_editor):
+    """
+    Gives every stored object of the existing files a blob, files saved under the same
+    name share the same object already.
+    """
+    File = apps.get_model("docs", "File")
+    Blob = apps.get_model("docs", "Blob")
+    checksums = set()
+    objects = File.objects.values("file").annotate(
+        refs=Count("id"), checksum=Max("sha256"), size=Max("size")
+    )
+    for row in objects.order_by("file").iterator():
+        checksum = row["checksum"] or None
+        if checksum in checksums:
+            # Different objects with the same content stay apart
+            checksum = None
+        checksums.add(checksum)
+        blob = Blob.objects.create(
+            file=row["file"], sha256=checksum, size=row["size"], ref_count=row["refs"]
+        )
+        File.objects.filter(file=row["file"]).update(blob=blob)
+
+
+def remove_blobs(apps, schema_editor):
+    apps.get_model("docs", "File").objects.update(blob=None)
+    apps.get_model("docs", "Blob").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("docs", "0006_file_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file", models.FileField(max_length=255, upload_to="blobs/")),
+                (
+                    "sha256",
+                    models.CharField(blank=True, max_length=64, null=True, unique=True),
+                ),
+                ("size", models.BigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="files",
+                to="docs.blob",
+            ),
+        ),
+        migrations.RunPython(create_blobs, remove_blobs),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("docs", "0007_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blob",
+            name="preview",
+            field=models.FileField(blank=True, max_length=255, upload_to="previews/"),
+        ),
+        migrations.AddField(
+            model_name="blob",
+            name="preview_status",
+            field=models.CharField(
+                choices=[
+                    ("none", "No preview"),
+                    ("pending", "Pending"),
+                    ("generating", "Generating"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                ],
+                default="none",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="blob",
+            name="preview_updated",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="blob",
+            index=models.Index(
+                fields=["preview_status", "preview_updated"],
+                name="blob_preview_status_idx",
+            ),
+        ),
+    ]
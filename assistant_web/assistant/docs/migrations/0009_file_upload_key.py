@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("docs", "0008_blob_preview"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="upload_key",
+            field=models.CharField(blank=True, default="", max_length=500),
+        ),
+        migrations.AddConstraint(
+            model_name="file",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("upload_key", ""), _negated=True),
+                fields=("user", "upload_key"),
+                name="file_user_upload_key_uniq",
+            ),
+        ),
+    ]
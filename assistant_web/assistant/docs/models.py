@@ -1,6 +1,55 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 
+from .metadata import category_for_extension
+
+
+class Blob(models.Model):
+    """
+    A stored content, shared by every File with the same sha256 checksum.
+    ref_count counts those files; the object is deleted from S3 with the last one, see docs.blobs.
+    Images and PDFs get a small preview rendered by a background worker, see docs.previews.
+    """
+
+    PREVIEW_STATUS_CHOICES = [
+        ("none", "No preview"),
+        ("pending", "Pending"),
+        ("generating", "Generating"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    file = models.FileField(upload_to="blobs/", max_length=255)  # the S3 object
+    sha256 = models.CharField(
+        max_length=64, unique=True, blank=True, null=True
+    )  # hex digest, unknown for some older files
+    size = models.BigIntegerField(default=0)  # in bytes
+    ref_count = models.PositiveIntegerField(default=0)  # files of this content
+    created = models.DateTimeField(auto_now_add=True)
+    preview = models.FileField(
+        upload_to="previews/", max_length=255, blank=True
+    )  # the thumbnail or first page, once done
+    preview_status = models.CharField(
+        max_length=20, choices=PREVIEW_STATUS_CHOICES, default="none"
+    )
+    preview_updated = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Serves the generate_previews worker
+            models.Index(
+                fields=["preview_status", "preview_updated"],
+                name="blob_preview_status_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.file.name
+
 
 class File(models.Model):
     CATEGORY_CHOICES = [
@@ -12,17 +61,52 @@ class File(models.Model):
         ("other", "Other"),
     ]
 
-    file = models.FileField(upload_to="files/")  # the file itself to be saved
+    file = models.FileField(
+        upload_to="files/"
+    )  # the file itself to be saved, the object of its blob
+    blob = models.ForeignKey(
+        Blob, on_delete=models.PROTECT, blank=True, null=True, related_name="files"
+    )  # the shared content, see docs.blobs
     upload_date = models.DateTimeField(auto_now_add=True)  # download date
     category = models.CharField(
         max_length=50, choices=CATEGORY_CHOICES
     )  # file category
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE
-    )  # the user who uploaded the file
+        User, on_delete=models.CASCADE, db_index=False
+    )  # the user who uploaded the file, indexed by the composite indexes in Meta
     display_name = models.CharField(
         max_length=255, blank=True, null=True
     )  # the name of the file to be displayed
+    # Extracted from the content while it is uploaded, see docs.metadata
+    size = models.BigIntegerField(default=0)  # in bytes
+    mime_type = models.CharField(max_length=100, blank=True, default="")
+    width = models.PositiveIntegerField(blank=True, null=True)  # of images
+    height = models.PositiveIntegerField(blank=True, null=True)  # of images
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # hex digest
+    # The key a direct upload was sent to, see docs.views.complete_upload
+    upload_key = models.CharField(max_length=500, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # Serves the newest-first file list, see docs.views.user_files
+            models.Index(
+                fields=["user", "upload_date", "id"], name="file_user_upload_idx"
+            ),
+            # Serves the category filter of the file list
+            models.Index(fields=["user", "category"], name="file_user_category_idx"),
+            # Serves the largest-first file list
+            models.Index(fields=["user", "size", "id"], name="file_user_size_idx"),
+            # Finds the copies of a content
+            models.Index(fields=["sha256"], name="file_sha256_idx"),
+        ]
+        constraints = [
+            # A direct upload is registered once, however often it is completed
+            models.UniqueConstraint(
+                fields=["user", "upload_key"],
+                condition=~models.Q(upload_key=""),
+                name="file_user_upload_key_uniq",
+            ),
+        ]
 
     def __str__(self):
         """
@@ -57,40 +141,96 @@ class File(models.Model):
     def determine_category(filename):
         """
         The determine_category function takes a filename as an argument and returns the category of that file.
+        Uploads are classified by their content instead, see docs.metadata.
 
         :param filename: Determine the file extension
         :return: A string
         :doc-author: Trelent
         """
-        # Category definition based on file extension
-        IMAGE_EXTENSIONS = ["jpg", "jpeg", "png", "bmp", "gif", "svg", "tiff", "webp"]
-        DOCUMENT_EXTENSIONS = [
-            "pdf",
-            "doc",
-            "docx",
-            "xls",
-            "xlsx",
-            "ppt",
-            "pptx",
-            "odt",
-            "ods",
-            "txt",
+        return category_for_extension(filename)
+
+    def apply_metadata(self, metadata):
+        """
+        The apply_metadata function stores the metadata extracted from the content of the file,
+        see docs.metadata.MetadataExtractor.
+
+        :param self: Represent the instance of the object itself
+        :param metadata: A dictionary with the size, mime_type, category, width, height and sha256
+        :return: None
+        :doc-author: Trelent
+        """
+        for field in ("size", "mime_type", "category", "width", "height", "sha256"):
+            setattr(self, field, metadata[field])
+
+
+class Upload(models.Model):
+    """
+    A file sent in chunks, staged on the local disk until a background worker
+    transfers it to S3 and creates its File, see docs.transfer.
+    """
+
+    STATUS_CHOICES = [
+        ("receiving", "Receiving"),
+        ("queued", "Queued"),
+        ("transferring", "Transferring"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False
+    )  # the uploader, indexed by the composite index in Meta
+    filename = models.CharField(max_length=255)  # the name of the uploaded file
+    size = models.BigIntegerField()  # the announced size in bytes
+    received = models.BigIntegerField(default=0)  # bytes staged so far
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="receiving"
+    )
+    error = models.TextField(blank=True)  # why the last transfer failed
+    file = models.ForeignKey(
+        File, on_delete=models.SET_NULL, blank=True, null=True
+    )  # the created file once transferred
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status"], name="upload_user_status_idx"),
+            # Serves the transfer_uploads worker
+            models.Index(
+                fields=["status", "updated"], name="upload_status_updated_idx"
+            ),
         ]
-        VIDEO_EXTENSIONS = ["mp4", "mkv", "flv", "avi", "mov", "wmv"]
-        AUDIO_EXTENSIONS = ["mp3", "wav", "ogg", "m4a", "aac", "flac"]
-        ARCHIVE_EXTENSIONS = ["zip", "rar", "7z", "tar", "gz"]
-
-        extension = filename.split(".")[-1].lower()
-
-        if extension in IMAGE_EXTENSIONS:
-            return "image"
-        elif extension in DOCUMENT_EXTENSIONS:
-            return "document"
-        elif extension in VIDEO_EXTENSIONS:
-            return "video"
-        elif extension in AUDIO_EXTENSIONS:
-            return "audio"
-        elif extension in ARCHIVE_EXTENSIONS:
-            return "archive"
-        else:
-            return "other"
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def staged_path(self):
+        """
+        The staged_path function returns where the received chunks of the upload are written.
+
+        :param self: Represent the instance of the object itself
+        :return: An absolute path in UPLOAD_STAGING_DIR
+        :doc-author: Trelent
+        """
+        return os.path.join(settings.UPLOAD_STAGING_DIR, f"{self.pk}.part")
+
+    def as_dict(self):
+        """
+        The as_dict function returns the progress of the upload, as served by the status endpoint.
+
+        :param self: Represent the instance of the object itself
+        :return: A dictionary
+        :doc-author: Trelent
+        """
+        return {
+            "id": str(self.pk),
+            "filename": self.filename,
+            "size": self.size,
+            "received": self.received,
+            "status": self.status,
+            "error": self.error,
+            "file_id": self.file_id,
+        }
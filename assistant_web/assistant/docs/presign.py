@@ -0,0 +1,139 @@
+import base64
+import mimetypes
+import os
+import uuid
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.http import content_disposition_header
+from django.utils.text import get_valid_filename
+
+from .metadata import HEAD_SIZE, describe
+
+
+def s3_client():
+    """
+    The s3_client function returns the signed boto3 client of the default storage,
+    so presigned urls use the same credentials, region and endpoint as the storage.
+
+    :return: A boto3 S3 client
+    :doc-author: Trelent
+    """
+    return default_storage.connection.meta.client
+
+
+def user_prefix(user):
+    """
+    The user_prefix function returns the part of the S3 key every direct upload of a user starts with.
+
+    :param user: The uploader
+    :return: A key prefix
+    :doc-author: Trelent
+    """
+    return f"files/{user.pk}/"
+
+
+def presigned_upload(user, filename, content_type, sha256=""):
+    """
+    The presigned_upload function returns a presigned PUT url for a new object under the
+    user's prefix, valid for AWS_QUERYSTRING_EXPIRE seconds. The returned headers are part
+    of the signature and must be sent with the file. With a sha256 checksum S3 refuses
+    any other content and the checksum is kept with the object.
+
+    :param user: The uploader
+    :param filename: The name of the uploaded file
+    :param content_type: The mime type of the uploaded file
+    :param sha256: The hex sha256 digest of the file, optional
+    :return: A dictionary with the key, url and headers
+    :doc-author: Trelent
+    """
+    key = f"{user_prefix(user)}{uuid.uuid4().hex}/{get_valid_filename(filename)}"
+    params = {"Bucket": default_storage.bucket_name, "Key": key}
+    headers = {"Content-Type": content_type or "application/octet-stream"}
+    params["ContentType"] = headers["Content-Type"]
+    cache_control = settings.AWS_S3_OBJECT_PARAMETERS.get("CacheControl")
+    if cache_control:
+        params["CacheControl"] = headers["Cache-Control"] = cache_control
+    if sha256:
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        params["ChecksumSHA256"] = headers["x-amz-checksum-sha256"] = checksum
+    url = s3_client().generate_presigned_url(
+        "put_object", Params=params, ExpiresIn=settings.AWS_QUERYSTRING_EXPIRE
+    )
+    return {"key": key, "url": url, "headers": headers}
+
+
+def uploaded_metadata(key):
+    """
+    The uploaded_metadata function returns the metadata of an uploaded object without downloading it:
+    the size and the checksum (if the upload was presigned with one) come from a HEAD request,
+    the type and image size from the first HEAD_SIZE bytes.
+
+    :param key: The S3 key of the object
+    :return: A dictionary like MetadataExtractor.metadata, or None if the object does not exist
+    :doc-author: Trelent
+    """
+    client = s3_client()
+    bucket = default_storage.bucket_name
+    try:
+        head = client.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise
+    first_bytes = b""
+    if head["ContentLength"]:
+        first_bytes = client.get_object(
+            Bucket=bucket, Key=key, Range=f"bytes=0-{HEAD_SIZE - 1}"
+        )["Body"].read()
+    metadata = describe(first_bytes, key)
+    metadata["size"] = head["ContentLength"]
+    checksum = head.get("ChecksumSHA256", "")
+    metadata["sha256"] = base64.b64decode(checksum).hex() if checksum else ""
+    return metadata
+
+
+def presigned_download(file_instance):
+    """
+    The presigned_download function returns a presigned GET url of a file, valid for
+    AWS_QUERYSTRING_EXPIRE seconds, that downloads it under its display name.
+
+    :param file_instance: The downloaded file
+    :return: A url
+    :doc-author: Trelent
+    """
+    filename = file_instance.get_display_filename()
+    # Shared contents are stored under their checksum, without an extension
+    extension = os.path.splitext(file_instance.file.name)[1] or (
+        mimetypes.guess_extension(file_instance.mime_type) or ""
+    )
+    if not filename.endswith(extension):
+        filename += extension
+    return s3_client().generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": default_storage.bucket_name,
+            "Key": file_instance.file.name,
+            "ResponseContentDisposition": content_disposition_header(
+                as_attachment=True, filename=filename
+            ),
+        },
+        ExpiresIn=settings.AWS_QUERYSTRING_EXPIRE,
+    )
+
+
+def presigned_preview(blob):
+    """
+    The presigned_preview function returns a presigned GET url of the preview of a blob,
+    valid for AWS_QUERYSTRING_EXPIRE seconds.
+
+    :param blob: A blob with a preview
+    :return: A url
+    :doc-author: Trelent
+    """
+    return s3_client().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": default_storage.bucket_name, "Key": blob.preview.name},
+        ExpiresIn=settings.AWS_QUERYSTRING_EXPIRE,
+    )
@@ -0,0 +1,265 @@
+import functools
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .blobs import delete_object
+from .models import Blob
+from .presign import s3_client
+
+# Rendered by Pillow
+IMAGE_PREVIEW_TYPES = frozenset(
+    ["image/jpeg", "image/png", "image/gif", "image/bmp", "image/tiff", "image/webp"]
+)
+# First pages rendered by pdftoppm of poppler-utils, if installed
+PDF_PREVIEW_TYPES = frozenset(["application/pdf"])
+
+# A preview name never changes its content, browsers and CDNs may keep it for a year
+PREVIEW_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Seconds a PDF may take to render
+PDF_RENDER_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def pillow_installed():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        logger.warning("Pillow is not installed, images get no previews")
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def pdftoppm_path():
+    path = shutil.which("pdftoppm")
+    if path is None:
+        logger.warning(
+            "pdftoppm is not installed (apt install poppler-utils), PDFs get no previews"
+        )
+    return path
+
+
+def previewable(mime_type, size):
+    """
+    The previewable function tells whether a preview can be rendered for a content,
+    depending on its type and on the renderers installed; a missing renderer is logged once.
+
+    :param mime_type: The sniffed mime type of the content
+    :param size: The size of the content in bytes, see PREVIEW_MAX_SOURCE_SIZE
+    :return: True or False
+    :doc-author: Trelent
+    """
+    if size > settings.PREVIEW_MAX_SOURCE_SIZE:
+        return False
+    if mime_type in IMAGE_PREVIEW_TYPES:
+        return pillow_installed()
+    if mime_type in PDF_PREVIEW_TYPES:
+        return pdftoppm_path() is not None
+    return False
+
+
+def render_image(path, size):
+    """
+    The render_image function scales an image down to fit a size x size square.
+    JPEGs are decoded at a reduced scale, so large photos are never decoded in full.
+    Images with transparency are kept as PNG, the others become JPEG.
+
+    :param path: The local path of the image
+    :param size: The largest width or height of the preview in pixels
+    :return: A (bytes, content type, extension) tuple
+    :doc-author: Trelent
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image.draft("RGB", (size, size))
+        # Photos taken sideways are turned upright
+        preview = ImageOps.exif_transpose(image)
+        preview.thumbnail((size, size))
+    output = io.BytesIO()
+    if preview.mode in ("RGBA", "LA") or "transparency" in preview.info:
+        preview.convert("RGBA").save(output, "PNG", optimize=True)
+        return output.getvalue(), "image/png", "png"
+    preview.convert("RGB").save(output, "JPEG", quality=80, optimize=True)
+    return output.getvalue(), "image/jpeg", "jpg"
+
+
+def render_pdf(path, size):
+    """
+    The render_pdf function renders the first page of a PDF with pdftoppm,
+    scaled to fit a size x size square.
+
+    :param path: The local path of the PDF
+    :param size: The largest width or height of the preview in pixels
+    :return: A (bytes, content type, extension) tuple
+    :doc-author: Trelent
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, "page")
+        subprocess.run(
+            [
+                pdftoppm_path(),
+                "-png",
+                "-f",
+                "1",
+                "-l",
+                "1",
+                "-singlefile",
+                "-scale-to",
+                str(size),
+                path,
+                output,
+            ],
+            check=True,
+            capture_output=True,
+            timeout=PDF_RENDER_TIMEOUT,
+        )
+        with open(f"{output}.png", "rb") as page:
+            return page.read(), "image/png", "png"
+
+
+def render_preview(blob, mime_type):
+    """
+    The render_preview function downloads the content of a blob to a temporary file,
+    renders its preview and stores it in S3 with long cache headers. The name holds
+    the blob and the preview size, so a stored preview never changes.
+
+    :param blob: The blob to preview
+    :param mime_type: The mime type of its content
+    :return: The name of the stored preview
+    :doc-author: Trelent
+    """
+    size = settings.PREVIEW_SIZE
+    renderer = render_pdf if mime_type in PDF_PREVIEW_TYPES else render_image
+    with tempfile.NamedTemporaryFile() as local:
+        with default_storage.open(blob.file.name, "rb") as content:
+            shutil.copyfileobj(content, local)
+        local.flush()
+        data, content_type, extension = renderer(local.name, size)
+    name = f"previews/{blob.pk}-{size}.{extension}"
+    s3_client().put_object(
+        Bucket=default_storage.bucket_name,
+        Key=name,
+        Body=data,
+        ContentType=content_type,
+        CacheControl=PREVIEW_CACHE_CONTROL,
+    )
+    return name
+
+
+def generate_preview(blob_id):
+    """
+    The generate_preview function renders the preview of a pending blob.
+    The blob is claimed by switching its status, so it is never rendered twice;
+    a preview finished after its blob was deleted is deleted as well.
+
+    :param blob_id: The primary key of a pending blob
+    :return: The name of the preview, or None if the blob was not pending
+    :doc-author: Trelent
+    """
+    close_old_connections()
+    try:
+        claimed = Blob.objects.filter(pk=blob_id, preview_status="pending").update(
+            preview_status="generating", preview_updated=timezone.now()
+        )
+        if not claimed:
+            return None
+        generating = Blob.objects.filter(pk=blob_id, preview_status="generating")
+        blob = generating.first()
+        if blob is None:
+            return None
+        mime_type = blob.files.values_list("mime_type", flat=True).first()
+        try:
+            name = render_preview(blob, mime_type or "")
+        except Exception:
+            generating.update(preview_status="failed", preview_updated=timezone.now())
+            raise
+        if not generating.update(
+            preview=name, preview_status="done", preview_updated=timezone.now()
+        ):
+            delete_object(name)
+        return name
+    finally:
+        close_old_connections()
+
+
+def _generate_in_background(blob_id):
+    try:
+        generate_preview(blob_id)
+    except Exception:
+        logger.exception("Preview of blob %s failed", blob_id)
+
+
+def enqueue_preview(blob_id):
+    """
+    The enqueue_preview function hands a pending blob to the PREVIEW_WORKERS background threads.
+    With no workers it stays pending for the generate_previews command.
+
+    :param blob_id: The primary key of a pending blob
+    :return: None
+    :doc-author: Trelent
+    """
+    global _executor
+    if not settings.PREVIEW_WORKERS:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PREVIEW_WORKERS,
+                thread_name_prefix="preview",
+            )
+    _executor.submit(_generate_in_background, blob_id)
+
+
+def request_preview(file_instance):
+    """
+    The request_preview function queues the preview of a new file's content, unless its blob
+    has one already or none can be rendered. The workers start once the transaction is committed.
+
+    :param file_instance: A saved File with its blob
+    :return: None
+    :doc-author: Trelent
+    """
+    if file_instance.blob_id is None:
+        return
+    if not previewable(file_instance.mime_type, file_instance.size):
+        return
+    requested = Blob.objects.filter(
+        pk=file_instance.blob_id, preview_status="none"
+    ).update(preview_status="pending", preview_updated=timezone.now())
+    if requested:
+        blob_id = file_instance.blob_id
+        transaction.on_commit(lambda: enqueue_preview(blob_id))
+
+
+def requeue_stale_previews(seconds):
+    """
+    The requeue_stale_previews function queues again the previews that did not finish
+    within seconds, e.g. because their worker was stopped.
+
+    :param seconds: The age in seconds of an unfinished preview
+    :return: The number of queued previews
+    :doc-author: Trelent
+    """
+    return Blob.objects.filter(
+        preview_status="generating",
+        preview_updated__lt=timezone.now() - timedelta(seconds=seconds),
+    ).update(preview_status="pending")
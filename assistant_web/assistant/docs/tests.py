@@ -1,3 +1,357 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .blobs import adopt_blob
+from .metadata import HEAD_SIZE, describe, extract_metadata, sniff_mime_type
+from .models import Blob, File, Upload
+from .presign import uploaded_metadata, user_prefix
+from .transfer import advance_upload, stage_chunk, transfer_upload
+
+try:
+    import moto  # noqa: F401
+
+    from .fake_s3 import FakeS3
+except ImportError:
+    moto = None
+
+CHUNK_SIZE = 4
+
+
+@unittest.skipUnless(moto, 'The fake S3 needs moto, pip install "moto[server]"')
+class UploadTestCase(TransactionTestCase):
+    """
+    Runs every test against a fresh local S3 (moto) and a temporary staging directory.
+    The transfers commit on their own connection, hence no TestCase transaction.
+    """
+
+    def setUp(self):
+        super().setUp()
+        staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging, ignore_errors=True)
+        settings_override = override_settings(
+            UPLOAD_STAGING_DIR=staging,
+            UPLOAD_CHUNK_SIZE=CHUNK_SIZE,
+            UPLOAD_TRANSFER_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.s3 = FakeS3()
+        self.s3.start()
+        self.addCleanup(self.s3.stop)
+        # Creating the bucket was the first request
+        self.s3.requests = 0
+        self.user = User.objects.create_user("uploader", password="secret")
+        self.client.force_login(self.user)
+
+    def start_upload(self, filename, size):
+        response = self.client.post(
+            reverse("docs:start_upload"), {"filename": filename, "size": size}
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send_chunk(self, state, payload, start):
+        chunk = payload[start : start + CHUNK_SIZE]
+        return self.client.post(
+            state["chunk_url"],
+            chunk,
+            content_type="application/octet-stream",
+            headers={
+                "Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{len(payload)}"
+            },
+        )
+
+    def exists(self, key):
+        listed = self.s3.client().list_objects_v2(Bucket=self.s3.bucket, Prefix=key)
+        return listed.get("KeyCount", 0) > 0
+
+    def stored(self, file_instance):
+        return (
+            self.s3.client()
+            .get_object(Bucket=self.s3.bucket, Key=file_instance.file.name)["Body"]
+            .read()
+        )
+
+
+class BrokenStream(io.BytesIO):
+    """A request body whose client goes away after sending three bytes."""
+
+    def read(self, size=-1):
+        if self.tell():
+            raise OSError("The client went away")
+        return super().read(3)
+
+
+class ChunkedUploadTests(UploadTestCase):
+    def test_chunks_are_staged_and_transferred(self):
+        payload = b"%PDF-1.4 chunked upload"
+        state = self.start_upload("report.pdf", len(payload))
+        for start in range(0, len(payload), CHUNK_SIZE):
+            self.assertEqual(self.send_chunk(state, payload, start).status_code, 200)
+        upload = Upload.objects.get(pk=state["id"])
+        self.assertEqual(upload.status, "queued")
+        self.assertEqual(self.s3.requests, 0)
+
+        file_instance = transfer_upload(upload.pk)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, "done")
+        self.assertEqual(upload.file, file_instance)
+        self.assertEqual(file_instance.category, "document")
+        self.assertEqual(self.stored(file_instance), payload)
+        self.assertFalse(os.path.exists(upload.staged_path))
+
+    def test_repeated_chunk_is_refused_with_the_offset_to_resume_from(self):
+        payload = b"0123456789"
+        state = self.start_upload("digits.txt", len(payload))
+        self.send_chunk(state, payload, 0)
+
+        response = self.send_chunk(state, payload, 0)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received"], CHUNK_SIZE)
+        for start in range(CHUNK_SIZE, len(payload), CHUNK_SIZE):
+            self.assertEqual(self.send_chunk(state, payload, start).status_code, 200)
+        self.assertEqual(Upload.objects.get(pk=state["id"]).status, "queued")
+
+    def test_interrupted_chunk_resumes_after_the_staged_bytes(self):
+        payload = b"abcdefghij"
+        upload = Upload.objects.get(pk=self.start_upload("letters.txt", 10)["id"])
+
+        written = stage_chunk(upload, 0, BrokenStream(payload), len(payload))
+        self.assertTrue(advance_upload(upload, 0, written))
+
+        state = self.client.get(reverse("docs:upload_status", args=[upload.pk])).json()
+        self.assertEqual(state["received"], 3)
+        for start in range(state["received"], len(payload), CHUNK_SIZE):
+            self.assertEqual(self.send_chunk(state, payload, start).status_code, 200)
+        self.assertEqual(self.stored(transfer_upload(upload.pk)), payload)
+
+    def test_failed_transfer_is_retried(self):
+        payload = b"retry me"
+        state = self.start_upload("retry.txt", len(payload))
+        for start in range(0, len(payload), CHUNK_SIZE):
+            self.send_chunk(state, payload, start)
+        with mock.patch("docs.transfer.store_file", side_effect=OSError("S3 is down")):
+            with self.assertRaises(OSError):
+                transfer_upload(state["id"])
+        upload = Upload.objects.get(pk=state["id"])
+        self.assertEqual(upload.status, "failed")
+        self.assertEqual(upload.error, "S3 is down")
+        self.assertTrue(os.path.exists(upload.staged_path))
+
+        call_command("transfer_uploads", stdout=io.StringIO())
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, "done")
+        self.assertEqual(self.stored(upload.file), payload)
+
+    def test_form_upload_is_staged_without_calling_s3(self):
+        response = self.client.post(
+            reverse("docs:user_files"),
+            {"file": SimpleUploadedFile("notes.txt", b"form upload")},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.s3.requests, 0)
+        upload = Upload.objects.get(user=self.user)
+        self.assertEqual(upload.status, "queued")
+
+        file_instance = transfer_upload(upload.pk)
+
+        self.assertEqual(self.stored(file_instance), b"form upload")
+
+
+class BackgroundTransferTests(UploadTestCase):
+    def test_completed_upload_is_transferred_by_the_workers(self):
+        payload = b"sent in the background"
+        with override_settings(UPLOAD_TRANSFER_WORKERS=1):
+            state = self.start_upload("background.txt", len(payload))
+            for start in range(0, len(payload), CHUNK_SIZE):
+                self.send_chunk(state, payload, start)
+            for _ in range(100):
+                state = self.client.get(state["status_url"]).json()
+                if state["status"] in ("done", "failed"):
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(state["status"], "done")
+        self.assertEqual(self.stored(File.objects.get(pk=state["file_id"])), payload)
+
+
+class DirectUploadTests(UploadTestCase):
+    def put(self, content, filename="direct.txt"):
+        """Uploads content under a new key of the user, like the browser with a presigned url."""
+        key = f"{user_prefix(self.user)}{hashlib.md5(os.urandom(8)).hexdigest()}/{filename}"
+        self.s3.client().put_object(
+            Bucket=self.s3.bucket,
+            Key=key,
+            Body=content,
+            ChecksumAlgorithm="SHA256",
+        )
+        return key
+
+    def complete(self, key):
+        return self.client.post(reverse("docs:complete_upload"), {"key": key})
+
+    def test_completion_is_repeated_safely(self):
+        key = self.put(b"direct content")
+        first = self.complete(key)
+        again = self.complete(key)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.json()["file_id"], first.json()["file_id"])
+        self.assertEqual(File.objects.filter(user=self.user).count(), 1)
+        self.assertTrue(self.exists(key))
+
+    def test_completion_of_a_stored_content_is_repeated_safely(self):
+        original = self.put(b"same content", "first.txt")
+        self.complete(original)
+        copy = self.put(b"same content", "second.txt")
+
+        first = self.complete(copy)
+        again = self.complete(copy)
+
+        # The copy was deleted, the file shares the stored content
+        self.assertFalse(self.exists(copy))
+        self.assertTrue(self.exists(original))
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["file_id"], first.json()["file_id"])
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    def test_concurrent_completion_keeps_the_uploaded_object(self):
+        key = self.put(b"completed twice")
+        metadata = uploaded_metadata(key)
+
+        # Both completions missed the file of the other one
+        first = adopt_blob(key, metadata)
+        second = adopt_blob(key, metadata)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertTrue(self.exists(key))
+
+    def test_failed_copy_releases_its_reference(self):
+        self.complete(self.put(b"copied content"))
+        sha256 = hashlib.sha256(b"copied content").hexdigest()
+
+        with mock.patch.object(File, "save", side_effect=OSError("Database is down")):
+            with self.assertRaises(OSError):
+                self.client.post(
+                    reverse("docs:complete_upload"),
+                    {"sha256": sha256, "filename": "copy.txt"},
+                )
+
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_last_reference_deletes_the_content(self):
+        key = self.put(b"shared content")
+        self.complete(key)
+        self.client.post(
+            reverse("docs:complete_upload"),
+            {
+                "sha256": hashlib.sha256(b"shared content").hexdigest(),
+                "filename": "copy.txt",
+            },
+        )
+        first, second = File.objects.filter(user=self.user).order_by("pk")
+
+        first.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        self.assertTrue(self.exists(key))
+
+        second.delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(self.exists(key))
+
+
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + struct.pack(">II", 640, 480)
+GIF = b"GIF89a" + struct.pack("<HH", 32, 16)
+# An APP0 segment comes before the start of frame
+JPEG = (
+    b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+    + bytes(9)
+    + b"\xff\xc0\x00\x11\x08"
+    + struct.pack(">HH", 300, 400)
+)
+WEBP = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00"
+    + bytes(4)
+    + (1919).to_bytes(3, "little")
+    + (1079).to_bytes(3, "little")
+)
+
+
+class MetadataTests(SimpleTestCase):
+    def test_signatures_win_over_the_extension(self):
+        for head, mime_type in (
+            (PNG, "image/png"),
+            (JPEG, "image/jpeg"),
+            (GIF, "image/gif"),
+            (WEBP, "image/webp"),
+            (b"%PDF-1.7\n", "application/pdf"),
+            (b"PK\x03\x04" + bytes(26), "application/zip"),
+            (bytes(257) + b"ustar", "application/x-tar"),
+            (b"\x00\x00\x00\x18ftypisom", "video/mp4"),
+            (b"\x00\x00\x00\x18ftypM4A ", "audio/mp4"),
+        ):
+            with self.subTest(mime_type=mime_type):
+                self.assertEqual(sniff_mime_type(head, "renamed.txt"), mime_type)
+
+    def test_containers_are_told_apart_by_the_extension(self):
+        zip_head = b"PK\x03\x04" + bytes(26)
+        ole_head = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + bytes(24)
+        self.assertEqual(
+            sniff_mime_type(zip_head, "report.docx"),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        )
+        self.assertEqual(sniff_mime_type(ole_head, "report.doc"), "application/msword")
+        self.assertEqual(sniff_mime_type(zip_head, "photos.zip"), "application/zip")
+        self.assertEqual(describe(zip_head, "report.docx")["category"], "document")
+        self.assertEqual(describe(ole_head, "blob.bin")["category"], "document")
+
+    def test_unknown_content_falls_back_to_the_extension(self):
+        self.assertEqual(sniff_mime_type(b"hello", "notes.txt"), "text/plain")
+        self.assertEqual(
+            sniff_mime_type(b"\x00\x01", "data"), "application/octet-stream"
+        )
+        # Text starting with "BM" is not a bitmap
+        self.assertEqual(sniff_mime_type(b"BMW cars", "cars.txt"), "text/plain")
+        self.assertEqual(
+            sniff_mime_type(b'<?xml version="1.0"?><svg>', "drawing"), "image/svg+xml"
+        )
+        self.assertEqual(describe(b"hello", "notes.txt")["category"], "document")
+
+    def test_image_sizes(self):
+        for head, filename, size in (
+            (PNG, "a.png", (640, 480)),
+            (GIF, "a.gif", (32, 16)),
+            (JPEG, "a.jpg", (400, 300)),
+            (WEBP, "a.webp", (1920, 1080)),
+            (PNG[:20], "cut.png", (None, None)),
+            (JPEG[:24], "cut.jpg", (None, None)),
+        ):
+            with self.subTest(filename=filename):
+                metadata = describe(head, filename)
+                self.assertEqual(metadata["category"], "image")
+                self.assertEqual((metadata["width"], metadata["height"]), size)
+
+    def test_extract_metadata_reads_the_whole_file(self):
+        content = PNG + os.urandom(HEAD_SIZE + 3 * 1024 * 1024)
+        metadata = extract_metadata(io.BytesIO(content), "big.png")
+        self.assertEqual(metadata["size"], len(content))
+        self.assertEqual(metadata["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(metadata["mime_type"], "image/png")
+        self.assertEqual((metadata["width"], metadata["height"]), (640, 480))
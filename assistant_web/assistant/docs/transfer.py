@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .blobs import release_blob, store_blob
+from .metadata import extract_metadata
+from .models import File, Upload
+from .previews import request_preview
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def create_upload(user, filename, size):
+    """
+    The create_upload function begins an upload and creates its empty staged file.
+    Chunks are only written to an existing staged file, so a request that is still writing
+    after the upload was transferred and its staged file removed fails instead of creating it again.
+
+    :param user: The uploader
+    :param filename: The name of the uploaded file
+    :param size: The size of the file in bytes
+    :return: The upload
+    :doc-author: Trelent
+    """
+    upload = Upload.objects.create(user=user, filename=filename, size=size)
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    open(upload.staged_path, "wb").close()
+    return upload
+
+
+def stage_chunk(upload, offset, stream, length):
+    """
+    The stage_chunk function writes a chunk of the upload at offset of its staged file,
+    reading the stream a block at a time so the chunk is never held in memory.
+    No lock is held while the chunk streams in, the received offset is only advanced
+    afterwards by advance_upload. Requests racing for the same offset write the same bytes
+    of the file, and only the first one to finish moves the offset.
+    If the stream breaks off, the bytes written so far are kept and the upload resumes after them.
+
+    :param upload: The upload
+    :param offset: Where the chunk starts, equal to upload.received
+    :param stream: A file-like object with the chunk, e.g. the request
+    :param length: The length of the chunk in bytes
+    :return: The number of bytes written
+    :doc-author: Trelent
+    """
+    written = 0
+    with open(upload.staged_path, "r+b") as staged:
+        staged.seek(offset)
+        try:
+            while written < length:
+                block = stream.read(min(64 * 1024, length - written))
+                if not block:
+                    break
+                staged.write(block)
+                written += len(block)
+        except OSError:
+            # The client went away, e.g. django.http.UnreadablePostError
+            pass
+    return written
+
+
+def advance_upload(upload, offset, written):
+    """
+    The advance_upload function records a staged chunk, unless another request staged the
+    chunk at offset first. With the last chunk the upload is queued, and handed to the
+    background transfer once the transaction is committed.
+
+    :param upload: The upload, updated in place
+    :param offset: Where the chunk starts
+    :param written: The number of bytes staged at offset
+    :return: True if the chunk was recorded, False if the upload moved on meanwhile
+    :doc-author: Trelent
+    """
+    received = offset + written
+    status = "queued" if received == upload.size else "receiving"
+    advanced = Upload.objects.filter(
+        pk=upload.pk, status="receiving", received=offset
+    ).update(received=received, status=status, updated=timezone.now())
+    if not advanced:
+        upload.refresh_from_db()
+        return False
+    upload.received = received
+    upload.status = status
+    if status == "queued":
+        transaction.on_commit(lambda: enqueue_transfer(upload.pk))
+    return True
+
+
+def stage_file(user, uploaded):
+    """
+    The stage_file function stages a file posted with the upload form and queues it for the
+    background transfer, like the chunks of a chunked upload, so the request never waits for S3.
+
+    :param user: The uploader
+    :param uploaded: The UploadedFile of the form
+    :return: The upload
+    :doc-author: Trelent
+    """
+    filename = os.path.basename(uploaded.name)[:255]
+    upload = create_upload(user, filename, uploaded.size)
+    uploaded.seek(0)
+    advance_upload(upload, 0, stage_chunk(upload, 0, uploaded, uploaded.size))
+    return upload
+
+
+def store_file(user, filename, content):
+    """
+    The store_file function creates the File of an upload. Its content is read once
+    to extract its metadata and checksum, and only sent to S3 if no blob has the same checksum.
+
+    :param user: The owner of the file
+    :param filename: The name of the uploaded file
+    :param content: A seekable file object with the content
+    :return: The created File
+    :doc-author: Trelent
+    """
+    metadata = extract_metadata(content, filename)
+    file_instance = File(user=user, file=filename)
+    file_instance.display_name = file_instance.get_display_filename()
+    file_instance.apply_metadata(metadata)
+    file_instance.blob = store_blob(content, metadata)
+    file_instance.file.name = file_instance.blob.file.name
+    try:
+        file_instance.save()
+    except Exception:
+        release_blob(file_instance.blob_id)
+        raise
+    request_preview(file_instance)
+    return file_instance
+
+
+def transfer_upload(upload_id):
+    """
+    The transfer_upload function sends a staged upload to S3 and creates its File.
+    The storage uploads large files in parallel multipart chunks, see AWS_S3_TRANSFER_CONFIG.
+    The upload is claimed by switching its status, so it is never transferred twice;
+    a failed transfer keeps the staged file and can be retried by the transfer_uploads command.
+
+    :param upload_id: The primary key of a queued or failed upload
+    :return: The created File, or None if the upload was not waiting for a transfer
+    :doc-author: Trelent
+    """
+    close_old_connections()
+    try:
+        claimed = Upload.objects.filter(
+            pk=upload_id, status__in=("queued", "failed")
+        ).update(status="transferring", error="", updated=timezone.now())
+        if not claimed:
+            return None
+        upload = Upload.objects.get(pk=upload_id)
+        try:
+            with open(upload.staged_path, "rb") as staged:
+                file_instance = store_file(upload.user, upload.filename, staged)
+        except Exception as e:
+            upload.status = "failed"
+            upload.error = str(e)
+            upload.save(update_fields=["status", "error", "updated"])
+            raise
+        upload.status = "done"
+        upload.file = file_instance
+        upload.save(update_fields=["status", "file", "updated"])
+        os.remove(upload.staged_path)
+        return file_instance
+    finally:
+        close_old_connections()
+
+
+def _transfer_in_background(upload_id):
+    try:
+        transfer_upload(upload_id)
+    except Exception:
+        logger.exception("Transfer of upload %s failed", upload_id)
+
+
+def enqueue_transfer(upload_id):
+    """
+    The enqueue_transfer function hands a received upload to the UPLOAD_TRANSFER_WORKERS
+    background threads. With no workers it stays queued for the transfer_uploads command.
+
+    :param upload_id: The primary key of a queued upload
+    :return: None
+    :doc-author: Trelent
+    """
+    global _executor
+    if not settings.UPLOAD_TRANSFER_WORKERS:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_TRANSFER_WORKERS,
+                thread_name_prefix="upload-transfer",
+            )
+    _executor.submit(_transfer_in_background, upload_id)
+
+
+def expire_uploads(hours=None):
+    """
+    The expire_uploads function deletes the uploads that received no chunk for hours
+    (UPLOAD_EXPIRY_HOURS by default) together with their staged files.
+
+    :param hours: The age in hours of the abandoned uploads
+    :return: The number of deleted uploads
+    :doc-author: Trelent
+    """
+    if hours is None:
+        hours = settings.UPLOAD_EXPIRY_HOURS
+    abandoned = Upload.objects.filter(
+        status="receiving", updated__lt=timezone.now() - timedelta(hours=hours)
+    )
+    deleted = 0
+    for upload in abandoned:
+        if os.path.exists(upload.staged_path):
+            os.remove(upload.staged_path)
+        upload.delete()
+        deleted += 1
+    return deleted
@@ -7,4 +7,11 @@ urlpatterns = [
     path("user_files/", views.user_files, name="user_files"),
     path("rename/", views.rename_file, name="rename_file"),
     path("delete/", views.delete_file, name="delete_file"),
+    path("direct/", views.presign_upload, name="presign_upload"),
+    path("direct/complete/", views.complete_upload, name="complete_upload"),
+    path("download/<int:file_id>/", views.download_file, name="download_file"),
+    path("preview/<int:file_id>/", views.preview_file, name="preview_file"),
+    path("uploads/", views.start_upload, name="start_upload"),
+    path("uploads/<uuid:upload_id>/", views.upload_status, name="upload_status"),
+    path("uploads/<uuid:upload_id>/chunk/", views.upload_chunk, name="upload_chunk"),
 ]
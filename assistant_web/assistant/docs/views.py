@@ -1,8 +1,35 @@
+import os
+import re
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import render, redirect
+from django.views.decorators.cache import cache_control, never_cache
+from django.urls import reverse
 from .forms import UploadFileForm, RenameFileForm
-from .models import File
+from .models import Blob, File, Upload
+from .blobs import add_reference, adopt_blob, release_blob
+from .previews import request_preview
+from .presign import (
+    presigned_download,
+    presigned_preview,
+    presigned_upload,
+    uploaded_metadata,
+    user_prefix,
+)
+from .transfer import advance_upload, create_upload, stage_chunk, stage_file
+from assistant.pagination import paginate_keyset
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+# Orderings of the file list, each served by an index in File.Meta
+FILE_ORDERINGS = {"newest": ("-upload_date", "-pk"), "largest": ("-size", "-pk")}
 
 
 def user_files(request):
@@ -18,21 +45,32 @@ def user_files(request):
     if request.method == "POST":
         form = UploadFileForm(request.POST, request.FILES)
         if form.is_valid():
-            file_instance = form.save(commit=False)
-            file_instance.user = request.user
-            file_instance.category = File.determine_category(file_instance.file.name)
-            file_instance.display_name = (
-                file_instance.get_display_filename()
-            )  # setting a "display" name
-            file_instance.save()
+            # Staged and sent to S3 in the background, like the chunked uploads;
+            # the transfer sets the category, a "display" name and the metadata of the content
+            stage_file(request.user, form.cleaned_data["file"])
             # To not show the form after loading, let's redirect the user
             return redirect("docs:user_files")
 
     files = File.objects.filter(user=request.user)
     # Get all the unique categories that belong to the user
     file_categories = files.values_list("category", flat=True).distinct()
+    category = request.GET.get("category")
+    if category:
+        files = files.filter(category=category)
+    # Newest (or largest) uploads first, a page at a time
+    sort = request.GET.get("sort")
+    if sort not in FILE_ORDERINGS:
+        sort = "newest"
+    # The blobs tell which files have a preview
+    page = paginate_keyset(request, files.select_related("blob"), FILE_ORDERINGS[sort])
 
-    context = {"files": files, "file_categories": file_categories}
+    context = {
+        "files": page,
+        "file_categories": file_categories,
+        "category": category,
+        "sort": sort,
+        "direct_uploads": settings.UPLOAD_DIRECT_TO_S3,
+    }
 
     return render(request, "docs/user_files.html", context)
 
@@ -82,10 +120,298 @@ def delete_file(request):
         try:
             file_id = request.POST.get("file_id")
             file_instance = File.objects.get(id=file_id, user=request.user)
-            file_instance.file.delete()  # this will delete the file from the server
-            file_instance.delete()  # this will delete the record from the database
+            # this will delete the record from the database, and the file from the server
+            # if no other record shares it, see docs.blobs
+            file_instance.delete()
             return JsonResponse({"status": "success"})
         except Exception as e:
             return JsonResponse({"status": "error", "message": str(e)})
     else:
         return JsonResponse({"status": "error", "message": "Invalid request method"})
+
+
+def upload_state(upload):
+    """
+    The upload_state function returns the progress of an upload with the urls
+    its chunks are sent to and its status is polled from.
+
+    :param upload: The upload
+    :return: A dictionary
+    :doc-author: Trelent
+    """
+    state = upload.as_dict()
+    state["chunk_size"] = settings.UPLOAD_CHUNK_SIZE
+    state["chunk_url"] = reverse("docs:upload_chunk", args=[upload.pk])
+    state["status_url"] = reverse("docs:upload_status", args=[upload.pk])
+    return state
+
+
+@login_required
+@require_POST
+def start_upload(request):
+    """
+    The start_upload function begins a chunked upload of a file announced by its filename and size.
+    The chunks are then sent to upload_chunk and the upload is followed with upload_status.
+
+    :param request: Get the filename and size post parameters
+    :return: A jsonresponse object with the state of the new upload
+    :doc-author: Trelent
+    """
+    filename = os.path.basename(request.POST.get("filename", "").strip())[:255]
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        size = -1
+    if not filename or size < 0:
+        return JsonResponse(
+            {"status": "error", "message": "A filename and size are required"},
+            status=400,
+        )
+
+    upload = create_upload(request.user, filename, size)
+    if size == 0:
+        # Nothing to receive, the empty staged file is complete
+        advance_upload(upload, 0, 0)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+@require_POST
+def upload_chunk(request, upload_id):
+    """
+    The upload_chunk function stages the chunk in the request body, sent as application/octet-stream
+    with a Content-Range: bytes start-end/size header, at most UPLOAD_CHUNK_SIZE bytes long.
+    A chunk must start where the received bytes end, otherwise the upload is answered with 409,
+    so an interrupted upload resumes by sending the rest from the returned received offset.
+    After the last chunk the upload is queued for the background transfer to S3.
+
+    :param request: Get the chunk
+    :param upload_id: The id of the upload
+    :return: A jsonresponse object with the state of the upload
+    :doc-author: Trelent
+    """
+    match = CONTENT_RANGE.fullmatch(request.headers.get("Content-Range", ""))
+    try:
+        length = int(request.headers.get("Content-Length", ""))
+    except ValueError:
+        length = -1
+    if not match:
+        return JsonResponse(
+            {"status": "error", "message": "Invalid Content-Range header"}, status=400
+        )
+    start, end, size = (int(group) for group in match.groups())
+    if length != end - start + 1 or length > settings.UPLOAD_CHUNK_SIZE:
+        return JsonResponse(
+            {"status": "error", "message": "Invalid chunk length"}, status=400
+        )
+
+    upload = get_object_or_404(Upload, pk=upload_id, user=request.user)
+    if upload.status != "receiving" or start != upload.received:
+        return JsonResponse(upload_state(upload), status=409)
+    if size != upload.size or end >= size:
+        return JsonResponse(
+            {"status": "error", "message": "The chunk is outside of the file"},
+            status=400,
+        )
+
+    # The chunk streams in without a lock, the offset is advanced once it is staged
+    try:
+        written = stage_chunk(upload, start, request, length)
+    except FileNotFoundError:
+        # The upload was completed and transferred by another request meanwhile
+        upload.refresh_from_db()
+        return JsonResponse(upload_state(upload), status=409)
+    if not advance_upload(upload, start, written):
+        return JsonResponse(upload_state(upload), status=409)
+    return JsonResponse(upload_state(upload))
+
+
+@login_required
+@require_GET
+def upload_status(request, upload_id):
+    """
+    The upload_status function returns how much of an upload was received and whether it was
+    already transferred to S3; a done upload carries the id of its file.
+
+    :param request: Get the current user
+    :param upload_id: The id of the upload
+    :return: A jsonresponse object with the state of the upload
+    :doc-author: Trelent
+    """
+    upload = get_object_or_404(Upload, pk=upload_id, user=request.user)
+    return JsonResponse(upload_state(upload))
+
+
+@login_required
+@require_POST
+def presign_upload(request):
+    """
+    The presign_upload function lets the browser upload a file straight to S3:
+    it returns a presigned PUT url for a new key under the user's prefix and the headers
+    to send with the file. Once the PUT succeeded, the key is posted to complete_upload.
+
+    :param request: Get the filename, content_type and optional sha256 post parameters
+    :return: A jsonresponse object with the key, url and headers
+    :doc-author: Trelent
+    """
+    filename = os.path.basename(request.POST.get("filename", "").strip())[:200]
+    if not filename:
+        return JsonResponse(
+            {"status": "error", "message": "A filename is required"}, status=400
+        )
+    sha256 = request.POST.get("sha256", "").lower()
+    if sha256 and not SHA256_HEX.fullmatch(sha256):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid sha256 checksum"}, status=400
+        )
+    if sha256 and owned_copy(request.user, sha256):
+        # The user has this content already, it does not need to be sent again
+        return JsonResponse(
+            {"existing": True, "complete_url": reverse("docs:complete_upload")},
+            status=201,
+        )
+    upload = presigned_upload(
+        request.user, filename, request.POST.get("content_type", ""), sha256
+    )
+    upload["existing"] = False
+    upload["complete_url"] = reverse("docs:complete_upload")
+    return JsonResponse(upload, status=201)
+
+
+def owned_copy(user, sha256):
+    """
+    The owned_copy function returns a file of the user with the content of a checksum, if any.
+    Only the user's own files are looked up, knowing a checksum gives no access to other users' files.
+
+    :param user: The owner of the files
+    :param sha256: The hex sha256 digest of the content
+    :return: A file or None
+    :doc-author: Trelent
+    """
+    return File.objects.filter(user=user, sha256=sha256, blob__isnull=False).first()
+
+
+@login_required
+@require_POST
+def complete_upload(request):
+    """
+    The complete_upload function registers the File of an object uploaded through presign_upload.
+    Only keys under the user's prefix are accepted and the object has to exist in S3;
+    completing the same key again returns the already registered file.
+    When presign_upload found the content among the user's files, the sha256 and filename
+    are posted instead of a key and the new file shares the stored content.
+
+    :param request: Get the key, or sha256 and filename, post parameters
+    :return: A jsonresponse object with the id of the file
+    :doc-author: Trelent
+    """
+    key = request.POST.get("key", "")
+    if not key:
+        return copy_owned_file(request)
+    if not key.startswith(user_prefix(request.user)) or ".." in key:
+        return JsonResponse({"status": "error", "message": "Invalid key"}, status=400)
+    # A content stored already keeps its own name, the key is recorded to find the file again
+    registered = File.objects.filter(user=request.user).filter(
+        Q(upload_key=key) | Q(file=key)
+    )
+    file_instance = registered.first()
+    if file_instance is None:
+        metadata = uploaded_metadata(key)
+        if metadata is None:
+            return JsonResponse(
+                {"status": "error", "message": "The file was not uploaded"}, status=400
+            )
+        file_instance = File(
+            user=request.user, file=key.rsplit("/", 1)[-1], upload_key=key
+        )
+        file_instance.display_name = file_instance.get_display_filename()
+        file_instance.apply_metadata(metadata)
+        file_instance.blob = adopt_blob(key, metadata)
+        file_instance.file.name = file_instance.blob.file.name
+        try:
+            with transaction.atomic():
+                file_instance.save()
+        except IntegrityError:
+            # A concurrent completion of the same key registered the file first
+            release_blob(file_instance.blob_id)
+            file_instance = registered.get()
+        except Exception:
+            release_blob(file_instance.blob_id)
+            raise
+        else:
+            request_preview(file_instance)
+    return JsonResponse({"status": "success", "file_id": file_instance.pk})
+
+
+def copy_owned_file(request):
+    """
+    The copy_owned_file function creates a file of a content the user has uploaded before,
+    see complete_upload.
+
+    :param request: Get the sha256 and filename post parameters
+    :return: A jsonresponse object with the id of the file
+    :doc-author: Trelent
+    """
+    filename = os.path.basename(request.POST.get("filename", "").strip())[:200]
+    original = owned_copy(request.user, request.POST.get("sha256", "").lower())
+    if original is None or not filename:
+        return JsonResponse(
+            {"status": "error", "message": "The file was not uploaded"}, status=400
+        )
+    blob = add_reference(Blob.objects.filter(pk=original.blob_id))
+    if blob is None:
+        return JsonResponse(
+            {"status": "error", "message": "The file was not uploaded"}, status=400
+        )
+    file_instance = File(user=request.user, file=filename)
+    file_instance.display_name = file_instance.get_display_filename()
+    for field in ("size", "mime_type", "category", "width", "height", "sha256"):
+        setattr(file_instance, field, getattr(original, field))
+    file_instance.blob = blob
+    file_instance.file.name = blob.file.name
+    try:
+        file_instance.save()
+    except Exception:
+        release_blob(blob.pk)
+        raise
+    return JsonResponse({"status": "success", "file_id": file_instance.pk})
+
+
+@never_cache
+@login_required
+@require_GET
+def download_file(request, file_id):
+    """
+    The download_file function redirects to a short-lived presigned url of the user's file,
+    so the file is downloaded from S3 and not through the web server.
+
+    :param request: Get the current user
+    :param file_id: The id of the file
+    :return: A redirect to S3
+    :doc-author: Trelent
+    """
+    file_instance = get_object_or_404(File, pk=file_id, user=request.user)
+    return redirect(presigned_download(file_instance))
+
+
+@cache_control(private=True, max_age=settings.AWS_QUERYSTRING_EXPIRE // 2)
+@login_required
+@require_GET
+def preview_file(request, file_id):
+    """
+    The preview_file function redirects to a presigned url of the preview of the user's file.
+    Browsers keep the redirect for half the lifetime of the url, so the file list shows
+    the previews from their cache instead of signing new urls on every page load.
+
+    :param request: Get the current user
+    :param file_id: The id of the file
+    :return: A redirect to S3
+    :doc-author: Trelent
+    """
+    file_instance = get_object_or_404(
+        File.objects.select_related("blob"),
+        pk=file_id,
+        user=request.user,
+        blob__preview_status="done",
+    )
+    return redirect(presigned_preview(file_instance.blob))
@@ -1,9 +1,8 @@
 #!/usr/bin/env python
 """Django's command-line utility for administrative tasks."""
+
 import os
 import sys
-import threading
-from timer import start_timer
 
 
 def main():
@@ -23,13 +22,16 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
+    # The autoreloader runs the server in a child process with RUN_MAIN set,
+    # start the news scheduler only there to avoid scraping twice
+    if sys.argv[1:2] == ["runserver"] and (
+        os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+    ):
+        from timer import start_timer
+
+        start_timer()
     execute_from_command_line(sys.argv)
 
 
 if __name__ == "__main__":
-
-    t = threading.Thread(target=start_timer)
-    t.daemon = True  
-    t.start()
-    
     main()
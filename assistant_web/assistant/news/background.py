@@ -0,0 +1,31 @@
+import threading
+
+from django.core.cache import cache
+
+
+def run_in_background(lock_key, target, *args, lock_timeout=30):
+    """
+    The run_in_background function runs target in a daemon thread unless the same job is already running.
+    The lock lives in the cache, so it is shared by every thread using the same cache backend,
+    and it is released as soon as the job finishes (or expires after lock_timeout seconds).
+
+    :param lock_key: Name the lock that guards the job
+    :param target: The function to run
+    :param *args: Arguments passed to the target
+    :param lock_timeout: Release the lock automatically if the job hangs
+    :return: True if the job was started, False if it is already running
+    :doc-author: Trelent
+    """
+    if not cache.add(lock_key, True, timeout=lock_timeout):
+        return False
+
+    def job():
+        try:
+            target(*args)
+        finally:
+            cache.delete(lock_key)
+
+    thread = threading.Thread(target=job)
+    thread.daemon = True
+    thread.start()
+    return True
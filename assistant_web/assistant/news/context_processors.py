@@ -1,37 +1,36 @@
-import requests
-from .views import fetch_news
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .currency import get_currency_rates
+from .widget import get_latest_news
 
 
 def news_widget(request):
     """
     The news_widget function is a view that returns the latest news items.
+    The value is lazy: the cached headlines are only looked up when a template
+    actually renders the widget.
 
     :param request: Get the language from the session
     :return: A dictionary
     :doc-author: Trelent
     """
-    lang = request.session.get(settings.LANGUAGE_SESSION_KEY, "en")
-    latest_news = fetch_news(lang)
-    return {"latest_news": latest_news}
+
+    def latest_news():
+        lang = request.session.get(settings.LANGUAGE_SESSION_KEY, "en")
+        return get_latest_news(lang)
+
+    return {"latest_news": SimpleLazyObject(latest_news)}
 
 
 def currency_data(request):
     """
     The currency_data function returns a dictionary of currency data.
     The keys are the currency codes, and the values are their exchange rates.
+    The rates are read from the cache, so rendering a page never waits for the NBU feed.
 
     :param request: Pass the request object to the view
     :return: A dictionary with two keys:
     :doc-author: Trelent
     """
-    currency = ["USD", "EUR"]
-    response_currency = requests.get(
-        "https://bank.gov.ua/NBUStatService/v1/statdirectory/exchange?json"
-    )
-    data = response_currency.json()
-    currency_info = {}
-    for item in data:
-        if item["cc"] in currency:
-            currency_info[item["cc"]] = item["rate"]
-    return {"currency_data": currency_info}
+    return {"currency_data": get_currency_rates()}
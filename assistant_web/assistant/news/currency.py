@@ -0,0 +1,86 @@
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from assistant.http_client import get_client
+
+from .background import run_in_background
+
+NBU_EXCHANGE_URL = "https://bank.gov.ua/NBUStatService/v1/statdirectory/exchange?json"
+CURRENCIES = ["USD", "EUR"]
+
+CURRENCY_CACHE_KEY = "news:currency_rates"
+CURRENCY_LOCK_KEY = "news:currency_rates:refreshing"
+
+
+def fetch_currency_rates():
+    """
+    The fetch_currency_rates function downloads the official NBU exchange rates
+    and keeps only the currencies shown in the navbar.
+
+    :return: A dictionary with currency codes as keys and rates as values
+    :doc-author: Trelent
+    """
+    response = get_client("nbu").get(NBU_EXCHANGE_URL)
+    response.raise_for_status()
+    return {
+        item["cc"]: item["rate"] for item in response.json() if item["cc"] in CURRENCIES
+    }
+
+
+def refresh_currency_rates():
+    """
+    The refresh_currency_rates function fetches fresh rates and stores them in the cache.
+    The cached entry never expires on its own, so if the NBU feed is slow or down
+    the last good value stays available until a later refresh succeeds.
+
+    :return: The fresh rates, or None if the feed could not be read
+    :doc-author: Trelent
+    """
+    try:
+        rates = fetch_currency_rates()
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        return None
+
+    if not rates:
+        return None
+    cache.set(
+        CURRENCY_CACHE_KEY, {"rates": rates, "fetched_at": time.time()}, timeout=None
+    )
+    return rates
+
+
+def refresh_in_background():
+    """
+    The refresh_in_background function starts a background refresh of the rates,
+    unless one is already running.
+
+    :return: True if a refresh was started, False if one is already running
+    :doc-author: Trelent
+    """
+    return run_in_background(
+        CURRENCY_LOCK_KEY,
+        refresh_currency_rates,
+        lock_timeout=settings.CURRENCY_FETCH_TIMEOUT * 2,
+    )
+
+
+def get_currency_rates():
+    """
+    The get_currency_rates function returns the cached exchange rates without touching the network.
+    When the cached value is older than CURRENCY_CACHE_TTL it is still returned,
+    and a background refresh is started (stale-while-revalidate).
+    On a cold cache an empty dictionary is returned until the first refresh finishes.
+
+    :return: A dictionary with currency codes as keys and rates as values
+    :doc-author: Trelent
+    """
+    entry = cache.get(CURRENCY_CACHE_KEY)
+    if entry is None:
+        refresh_in_background()
+        return {}
+    if time.time() - entry["fetched_at"] > settings.CURRENCY_CACHE_TTL:
+        refresh_in_background()
+    return entry["rates"]
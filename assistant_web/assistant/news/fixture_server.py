@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .scrap_news import topic_pages
+
+ARTICLES_PER_TOPIC = 5
+PARAGRAPHS_PER_ARTICLE = 12
+
+
+def index_page(topic: str, attr: str, base_url: str):
+    """
+    The index_page function renders a topic page with the same markup as unian.ua.
+
+    :param topic: str: The topic of the page
+    :param attr: str: The class of the headline links
+    :param base_url: str: The root url of the fixture server
+    :return: A html string
+    :doc-author: Trelent
+    """
+    links = "".join(
+        f'<a class="{attr}" href="{base_url}articles/{topic}-{n}.html">'
+        f'<img alt="{topic.title()} headline {n}" src="/img/{n}.jpg"></a>'
+        for n in range(ARTICLES_PER_TOPIC)
+    )
+    return f"<html><body><nav>{topic}</nav><main>{links}</main></body></html>"
+
+
+def article_page(name: str):
+    """
+    The article_page function renders an article page with the same markup as unian.ua.
+
+    :param name: str: The name of the article
+    :return: A html string
+    :doc-author: Trelent
+    """
+    paragraphs = "".join(
+        f"<p>Paragraph {n} of {name}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+        for n in range(PARAGRAPHS_PER_ARTICLE)
+    )
+    return (
+        "<html><head><title>{0}</title></head><body>"
+        '<div class="article__info-item time">10:15, 24.10.2023</div>'
+        '<div class="article">{1}</div>'
+        "<aside>{2}</aside></body></html>"
+    ).format(name, paragraphs, "<ul><li>related</li></ul>" * 50)
+
+
+class FixtureServer:
+    """
+    A local http server that imitates unian.ua, so the scraper can be run and benchmarked offline.
+    Every response is delayed by latency seconds to simulate a network round-trip,
+    and pages carry an ETag so conditional requests are answered with 304,
+    unless etags is False to imitate a site that sends no validators.
+    """
+
+    def __init__(self, latency=0.05, host="127.0.0.1", port=0, etags=True):
+        self.latency = latency
+        self.etags = etags
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def sport_url(self):
+        return self.base_url + "sport/"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._counter_lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                body = server.render(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                etag = f'"{hashlib.md5(payload).hexdigest()}"'
+                if server.etags and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if server.etags:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def render(self, path: str):
+        """
+        The render function returns the html served at path, or None for unknown pages.
+
+        :param path: str: The requested path
+        :return: A html string or None
+        :doc-author: Trelent
+        """
+        if path.startswith("/articles/"):
+            return article_page(path.rsplit("/", 1)[-1].removesuffix(".html"))
+        for topic, url, attr in topic_pages(self.base_url, self.sport_url):
+            if url == self.base_url + path.lstrip("/"):
+                return index_page(topic, attr, self.base_url)
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
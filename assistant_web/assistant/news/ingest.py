@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import News, PageValidator
+from .scrap_news import articles_scraped, topic_pages
+from .widget import invalidate_widget
+
+
+def stored_articles(urls):
+    """
+    The stored_articles function returns the articles among urls that are already in the database,
+    so the scraper reuses them when they did not change.
+
+    :param urls: A set of article urls
+    :return: A dictionary of {"content", "date"} dictionaries keyed by url
+    :doc-author: Trelent
+    """
+    rows = News.objects.filter(url__in=urls).values("url", "content", "date")
+    return {
+        row["url"]: {"content": row["content"], "date": row["date"]} for row in rows
+    }
+
+
+def stored_validators():
+    """
+    The stored_validators function returns the cache validators recorded by earlier scrapes.
+
+    :return: A dictionary of {"etag", "last_modified"} dictionaries keyed by url
+    :doc-author: Trelent
+    """
+    rows = PageValidator.objects.values_list("url", "etag", "last_modified")
+    return {
+        url: {"etag": etag, "last_modified": last_modified}
+        for url, etag, last_modified in rows
+    }
+
+
+def save_validators(validators):
+    """
+    The save_validators function records the cache validators of the downloaded pages.
+
+    :param validators: A dictionary of {"etag", "last_modified"} dictionaries keyed by url
+    :return: None
+    :doc-author: Trelent
+    """
+    PageValidator.objects.bulk_create(
+        [PageValidator(url=url, **value) for url, value in validators.items()],
+        update_conflicts=True,
+        unique_fields=["url"],
+        update_fields=["etag", "last_modified", "updated"],
+    )
+
+
+def prune_news(retention_days=None):
+    """
+    The prune_news function deletes the news published more than retention_days ago,
+    so the table does not grow without bound.
+    The newest NEWS_FEED_LIMIT news of every topic are always kept,
+    so the pages are not emptied when the scraper stops finding news for a while.
+
+    :param retention_days: Days news are kept, NEWS_RETENTION_DAYS by default
+    :return: The number of deleted news
+    :doc-author: Trelent
+    """
+    if retention_days is None:
+        retention_days = settings.NEWS_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted = 0
+    for topic, _, _ in topic_pages():
+        newest = News.objects.filter(topic=topic).order_by("-date")
+        oldest_kept = newest.values_list("date", flat=True)[
+            settings.NEWS_FEED_LIMIT - 1 : settings.NEWS_FEED_LIMIT
+        ].first()
+        if oldest_kept is None:
+            continue
+        deleted += News.objects.filter(
+            topic=topic, date__lt=min(cutoff, oldest_kept)
+        ).delete()[0]
+    if deleted:
+        # Validators of the deleted articles, the topic pages keep theirs
+        PageValidator.objects.exclude(url__in=News.objects.values("url")).exclude(
+            url__in=[url for _, url, _ in topic_pages()]
+        ).delete()
+    return deleted
+
+
+def fill_news(news_data=None):
+    """
+    The fill_news function saves scraped news to the database.
+    All topics are upserted with a single bulk INSERT ... ON CONFLICT keyed on
+    the article url within its topic, so changed articles are updated in place
+    instead of accumulating duplicates. Everything runs in one transaction,
+    so readers see either the old or the new news, never a half-written scrape.
+    Topics that came back empty keep their previous news.
+
+    A fresh scrape only downloads topic pages and articles that are new or changed,
+    the validators of the downloaded pages are stored in the same transaction as their news.
+    News older than the retention period are pruned in the same transaction.
+
+    :param news_data: Scraped news by topic, a fresh scrape is made if it is not given
+    :return: The number of saved news
+    :doc-author: Trelent
+    """
+    validators = previous = None
+    if news_data is None:
+        validators = stored_validators()
+        previous = dict(validators)
+        news_data = articles_scraped(
+            known_articles=stored_articles, validators=validators
+        )
+
+    # The same url can only be written once per statement
+    rows = {}
+    for key, value in news_data.items():
+        for el in value:
+            rows[(key, el["url"])] = News(
+                title=el["title"],
+                content=el["content"],
+                url=el["url"],
+                date=el["date"],
+                topic=key,
+            )
+
+    with transaction.atomic():
+        News.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=["topic", "url"],
+            # updated changes the version of the cached topic pages
+            update_fields=["title", "content", "date", "updated"],
+        )
+        prune_news()
+        transaction.on_commit(lambda: invalidate_widget("uk"))
+        if validators is not None:
+            # Stored with the news, so a page is only skipped once its news are saved
+            save_validators(
+                {
+                    url: value
+                    for url, value in validators.items()
+                    if previous.get(url) != value
+                }
+            )
+    return len(rows)
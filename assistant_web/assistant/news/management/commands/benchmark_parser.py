@@ -0,0 +1,102 @@
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from news.fixture_server import article_page, index_page
+from news.scrap_news import HTML_PARSER, parse_article, parse_headlines
+
+
+def full_tree_article(html, parser):
+    """The article parsing used before: a full tree and string concatenation."""
+    article_text = ""
+    soup = BeautifulSoup(html, parser)
+    date_published = soup.find("div", attrs={"class": "article__info-item time"}).text
+    for n in soup.find_all("div", attrs={"class": "article"}):
+        for el in reversed(n.find_all("p")):
+            article_text += el.text
+    return {"content": article_text, "date": date_published}
+
+
+class Command(BaseCommand):
+    help = "Benchmark parse time and peak memory per page of the news parser backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=Path,
+            help="Directory of saved article pages (*.html), "
+            "the fixture server pages are used if it is not given",
+        )
+        parser.add_argument(
+            "--save",
+            type=Path,
+            help="Save the fixture pages to this directory and exit",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["save"]:
+            options["save"].mkdir(parents=True, exist_ok=True)
+            for n in range(5):
+                path = options["save"] / f"article-{n}.html"
+                path.write_text(article_page(f"article-{n}"), encoding="utf-8")
+            self.stdout.write(f"Saved fixture pages to {options['save']}")
+            return
+
+        if options["pages"]:
+            articles = [
+                path.read_text(encoding="utf-8")
+                for path in sorted(options["pages"].glob("*.html"))
+            ]
+        else:
+            articles = [article_page(f"article-{n}") for n in range(5)]
+        index = index_page("main", "list-news__image psr", "http://127.0.0.1/")
+
+        parsers = ["html.parser"]
+        if HTML_PARSER != "html.parser":
+            parsers.append(HTML_PARSER)
+        self.stdout.write(
+            f"{len(articles)} article pages, {options['repeat']} runs each"
+        )
+        for parser in parsers:
+            self.measure(
+                f"{parser} full tree",
+                lambda html: full_tree_article(html, parser),
+                articles,
+                options["repeat"],
+            )
+            self.measure(
+                f"{parser} strainer",
+                lambda html: parse_article(html, parser),
+                articles,
+                options["repeat"],
+            )
+            self.measure(
+                f"{parser} headlines",
+                lambda html: parse_headlines(
+                    html, "list-news__image psr", parser=parser
+                ),
+                [index],
+                options["repeat"],
+            )
+
+    def measure(self, label, parse, pages, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                parse(html)
+        per_page = (time.perf_counter() - started) / (repeat * len(pages))
+
+        peak = 0
+        for html in pages:
+            tracemalloc.start()
+            parse(html)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.stdout.write(
+            f"{label:>24}: {per_page * 1000:.2f} ms/page, "
+            f"peak {peak / 1024:.0f} KiB/page"
+        )
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistant.http_client import get_client
+from news.fixture_server import FixtureServer
+from news.scrap_news import MAX_WORKERS, articles_scraped
+
+
+class Command(BaseCommand):
+    help = "Benchmark the news scraper against a local fixture server"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Delay of every fixture response in seconds",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=MAX_WORKERS,
+            help="Number of download threads for the parallel run",
+        )
+
+    def handle(self, *args, **options):
+        with FixtureServer(latency=options["latency"]) as server:
+            for label, workers in (("sequential", 1), ("parallel", options["workers"])):
+                server.requests = 0
+                started = time.perf_counter()
+                news = articles_scraped(server.base_url, server.sport_url, workers)
+                self.report(label, workers, server, news, started)
+
+            # A second scrape that already knows every article and topic page
+            stored = {item["url"]: item for items in news.values() for item in items}
+            validators = {}
+            articles_scraped(server.base_url, server.sport_url, validators=validators)
+            server.requests = 0
+            started = time.perf_counter()
+            news = articles_scraped(
+                server.base_url,
+                server.sport_url,
+                options["workers"],
+                known_articles=lambda urls: {
+                    u: stored[u] for u in urls & stored.keys()
+                },
+                validators=validators,
+            )
+            self.report("incremental", options["workers"], server, news, started)
+
+        stats = get_client("unian").metrics()
+        self.stdout.write(
+            f"upstream latency: {stats['requests']} requests, "
+            f"avg {stats['avg_time'] * 1000:.1f} ms, max {stats['max_time'] * 1000:.1f} ms, "
+            f"{stats['failures']} failures"
+        )
+
+    def report(self, label, workers, server, news, started):
+        elapsed = time.perf_counter() - started
+        articles = sum(len(items) for items in news.values())
+        self.stdout.write(
+            f"{label:>11}: {workers} worker(s), {server.requests} requests, "
+            f"{articles} articles in {elapsed:.2f}s"
+        )
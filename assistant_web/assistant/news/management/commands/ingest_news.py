@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.ingest import fill_news
+
+
+class Command(BaseCommand):
+    help = "Scrape the Ukrainian news and save them to the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and repeat the ingestion every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            saved = fill_news()
+            self.stdout.write(
+                f"Saved {saved} news in {time.perf_counter() - started:.1f}s"
+            )
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
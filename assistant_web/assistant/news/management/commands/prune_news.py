@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.ingest import prune_news
+
+
+class Command(BaseCommand):
+    help = "Delete the Ukrainian news older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Retention period in days, NEWS_RETENTION_DAYS by default",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_news(options["days"])
+        self.stdout.write(f"Deleted {deleted} news")
@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from news.newsapi import NEWSAPI_CATEGORIES, refresh_all_categories
+
+
+class Command(BaseCommand):
+    help = "Fetch all NewsAPI categories concurrently and store them in the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and repeat the refresh every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], (LocMemCache, DummyCache)):
+            # The web processes would never see what this process stores
+            raise CommandError(
+                "refresh_newsapi needs a cache shared with the web processes, "
+                "set CACHE_URL, e.g. CACHE_URL=rediscache://127.0.0.1:6379/1"
+            )
+        while True:
+            started = time.perf_counter()
+            refreshed = refresh_all_categories()
+            self.stdout.write(
+                f"Refreshed {refreshed} of {len(NEWSAPI_CATEGORIES)} categories "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
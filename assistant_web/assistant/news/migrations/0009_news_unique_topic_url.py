@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:54
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicates(apps, schema_editor):
+    """Keep only the newest row of every (topic, url) pair before adding the constraint."""
+    News = apps.get_model("news", "News")
+    newest = (
+        News.objects.values("topic", "url")
+        .annotate(newest_id=Max("id"))
+        .values_list("newest_id", flat=True)
+    )
+    News.objects.exclude(id__in=list(newest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0008_merge_20231024_1310"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="news",
+            constraint=models.UniqueConstraint(
+                fields=("topic", "url"), name="unique_news_topic_url"
+            ),
+        ),
+    ]
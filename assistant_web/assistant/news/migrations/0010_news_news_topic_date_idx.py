@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0009_news_unique_topic_url"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(fields=["topic", "date"], name="news_topic_date_idx"),
+        ),
+    ]
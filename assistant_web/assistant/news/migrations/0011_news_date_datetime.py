@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+
+KYIV = ZoneInfo("Europe/Kyiv")
+DATE_FORMATS = ("%H:%M, %d.%m.%Y", "%d.%m.%Y, %H:%M", "%d.%m.%Y %H:%M")
+
+
+def parse_dates(apps, schema_editor):
+    """Convert the scraped date strings, unknown formats get the migration time."""
+    News = apps.get_model("news", "News")
+    now = datetime.now(timezone.utc)
+    news = list(News.objects.only("date"))
+    for item in news:
+        text = " ".join(item.date.split())
+        item.published = now
+        for date_format in DATE_FORMATS:
+            try:
+                item.published = datetime.strptime(text, date_format).replace(
+                    tzinfo=KYIV
+                )
+                break
+            except ValueError:
+                continue
+    News.objects.bulk_update(news, ["published"], batch_size=500)
+
+
+def format_dates(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    news = list(News.objects.only("published"))
+    for item in news:
+        item.date = item.published.astimezone(KYIV).strftime(DATE_FORMATS[0])
+    News.objects.bulk_update(news, ["date"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("news", "0010_news_news_topic_date_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(model_name="news", name="news_topic_date_idx"),
+        # Nullable, so that unapplying can add the column back before filling it
+        migrations.AlterField(
+            model_name="news",
+            name="date",
+            field=models.CharField(null=True),
+        ),
+        migrations.AddField(
+            model_name="news",
+            name="published",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(parse_dates, format_dates),
+        migrations.RemoveField(model_name="news", name="date"),
+        migrations.RenameField(
+            model_name="news", old_name="published", new_name="date"
+        ),
+        migrations.AlterField(
+            model_name="news",
+            name="date",
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(fields=["topic", "date"], name="news_topic_date_idx"),
+        ),
+    ]
@@ -0,0 +1,25 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("news", "0011_news_date_datetime"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="updated",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(
+                fields=["topic", "updated"], name="news_topic_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0012_news_updated"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageValidator",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=500, unique=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=64)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
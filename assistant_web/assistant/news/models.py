@@ -1,8 +1,39 @@
 from django.db import models
 
+
 class News(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     url = models.URLField()
     topic = models.CharField()
-    date = models.CharField()
\ No newline at end of file
+    date = models.DateTimeField()  # publication time
+    updated = models.DateTimeField(auto_now=True)  # last scraped change, see page_cache
+
+    class Meta:
+        constraints = [
+            # Scraped news are upserted by article url within a topic
+            models.UniqueConstraint(
+                fields=["topic", "url"], name="unique_news_topic_url"
+            ),
+        ]
+        indexes = [
+            # Serves the newest news of a topic
+            models.Index(fields=["topic", "date"], name="news_topic_date_idx"),
+            # Serves the version of the cached topic pages
+            models.Index(fields=["topic", "updated"], name="news_topic_updated_idx"),
+        ]
+
+
+class PageValidator(models.Model):
+    """
+    The ETag and Last-Modified headers of a scraped topic page or article, sent back with
+    the next request of the page so an unchanged page is answered with 304, see news.ingest.
+    """
+
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
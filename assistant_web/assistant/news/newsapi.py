@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from assistant.http_client import get_client
+
+NEWSAPI_URL = "https://newsapi.org/v2/top-headlines"
+
+NEWSAPI_CATEGORIES = [
+    "business",
+    "entertainment",
+    "general",
+    "health",
+    "science",
+    "sports",
+    "technology",
+]
+
+
+def parse_date(iso_date):
+    """
+    The parse_date function takes a string in ISO 8601 format and returns a datetime object.
+
+    :param iso_date: Pass the date string to the function
+    :return: A datetime object
+    :doc-author: Trelent
+    """
+    return datetime.fromisoformat(iso_date.replace("Z", "+00:00"))
+
+
+def get_news(category="general"):
+    """
+    The get_news function takes in a category as an argument and returns the top headlines from that category.
+    The default value for the category is &quot;general&quot;.
+
+    :param category: Specify the category of news you want to get
+    :return: A list of dictionaries
+    :doc-author: Trelent
+    """
+    parameters = {
+        "country": "us",
+        "category": category,
+        "apiKey": settings.NEWSAPI_KEY,
+    }
+    response = get_client("newsapi").get(NEWSAPI_URL, params=parameters)
+    data = response.json()
+    return data["articles"]
+
+
+def category_cache_key(category):
+    """
+    The category_cache_key function returns the cache key of a NewsAPI category.
+
+    :param category: The NewsAPI category
+    :return: A string
+    :doc-author: Trelent
+    """
+    return f"news:newsapi:{category}"
+
+
+def last_good_cache_key(category):
+    """
+    The last_good_cache_key function returns the cache key of the last successful fetch of a category,
+    which never expires and is served while NewsAPI is unavailable.
+
+    :param category: The NewsAPI category
+    :return: A string
+    :doc-author: Trelent
+    """
+    return f"news:newsapi:{category}:last_good"
+
+
+def load_category(category):
+    """
+    The load_category function fetches a category from NewsAPI, formats the publication dates
+    for display and stores the result in the cache.
+
+    :param category: The NewsAPI category
+    :return: A list of dictionaries, or None if NewsAPI could not be read
+    :doc-author: Trelent
+    """
+    try:
+        news_data = get_news(category)
+    except (requests.RequestException, ValueError, KeyError):
+        return None
+    for item in news_data:
+        item["publishedAt"] = parse_date(item["publishedAt"]).strftime(
+            "%d %B, %Y %H:%M"
+        )
+    cache.set(category_cache_key(category), news_data, settings.NEWSAPI_CACHE_TTL)
+    cache.set(last_good_cache_key(category), news_data, timeout=None)
+    return news_data
+
+
+def get_category_news(category="general"):
+    """
+    The get_category_news function returns the cached headlines of a NewsAPI category.
+    User requests never call NewsAPI, refresh_all_categories does it on a fixed schedule;
+    until it refreshes the cache the last successfully fetched headlines are returned.
+
+    :param category: The NewsAPI category
+    :return: A list of dictionaries with preformatted publishedAt dates, empty before the first refresh
+    :doc-author: Trelent
+    """
+    news_data = cache.get(category_cache_key(category))
+    if news_data is None:
+        news_data = cache.get(last_good_cache_key(category))
+    return news_data or []
+
+
+def refresh_all_categories():
+    """
+    The refresh_all_categories function fetches every NewsAPI category concurrently and stores them in the cache.
+    Run on a schedule shorter than NEWSAPI_CACHE_TTL, it keeps the cache warm,
+    so user requests never wait for NewsAPI and the upstream usage is a fixed
+    number of calls per interval.
+
+    :return: The number of categories that were refreshed
+    :doc-author: Trelent
+    """
+    with ThreadPoolExecutor(len(NEWSAPI_CATEGORIES)) as executor:
+        results = executor.map(load_category, NEWSAPI_CATEGORIES)
+    return sum(1 for news_data in results if news_data is not None)
@@ -0,0 +1,22 @@
+from django.db.models import Count, Max
+
+from .models import News
+
+
+def pages_version(topic):
+    """
+    The pages_version function returns the version of the cached news page of a topic.
+    It is part of the key of the cached page fragment and is read from the news of the topic,
+    so a scrape stored by any process (e.g. the ingest_news worker) makes the page stale
+    in every web process. Served by the (topic, updated) index.
+
+    :param topic: The topic of the page
+    :return: A string
+    :doc-author: Trelent
+    """
+    state = News.objects.filter(topic=topic).aggregate(
+        updated=Max("updated"), count=Count("pk")
+    )
+    if state["updated"] is None:
+        return "empty"
+    return f"{state['updated'].timestamp()}-{state['count']}"
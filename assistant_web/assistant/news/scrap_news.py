@@ -1,116 +1,343 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
 import requests
-from bs4 import BeautifulSoup
-import time
-import json
-import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+from assistant.http_client import get_client
+
+UNIAN_URL = "https://www.unian.ua/"
+SPORT_URL = "https://sport.unian.ua/"
+
+LIST_TOPIC_NEWS = ["", "war", "science", "world", "society", "economics", "sport"]
+CLASS1_TOPICS = ["economics", "sport"]
+CLASS2_TOPICS = ["war", "science", "world", "society"]
+
+# Publication times on unian.ua are Kyiv local time, e.g. "10:15, 24.10.2023"
+UNIAN_TIMEZONE = ZoneInfo("Europe/Kyiv")
+UNIAN_DATE_FORMATS = ("%H:%M, %d.%m.%Y", "%d.%m.%Y, %H:%M", "%d.%m.%Y %H:%M")
+
+MAX_WORKERS = 8  # threads shared by index and article downloads
+MAX_PER_HOST = 4  # simultaneous requests to a single host
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Only the elements the scraper reads are turned into a tree
+ARTICLE_STRAINER = SoupStrainer(
+    "div",
+    attrs={
+        "class": lambda value: bool(value)
+        and ("article" in value.split() or value == "article__info-item time")
+    },
+)
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
 
 
-def scrap_article(url: str):
+def host_limit(url: str):
     """
-    The scrap_article function takes a url as an argument and returns a dictionary with the following keys:
-        - content: The text of the article.
-        - date: The date on which the article was published.
+    The host_limit function returns the semaphore that limits concurrent requests to the host of url.
 
+    :param url: str: The url that is about to be requested
+    :return: A threading semaphore
+    :doc-author: Trelent
+    """
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_limits[host]
+
+
+def fetch(url: str, validators=None):
+    """
+    The fetch function downloads a page, respecting the per-host concurrency limit.
+    When the validators dictionary holds the ETag and Last-Modified headers of an earlier
+    response of url, they are sent back, so an unchanged page costs a 304 response without a body.
 
-    :param url: str: Specify the type of data that will be passed to the function
-    :return: A dictionary with two keys:
+    :param url: str: The url of the page
+    :param validators: A dictionary of cache validators keyed by url, see response_validators
+    :return: The response, or None if the page could not be downloaded
     :doc-author: Trelent
     """
-    article_scrap = {}
-    article_text = ""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    if response.status_code == 200:
+    headers = {}
+    if validators is not None and url in validators:
+        if validators[url].get("etag"):
+            headers["If-None-Match"] = validators[url]["etag"]
+        if validators[url].get("last_modified"):
+            headers["If-Modified-Since"] = validators[url]["last_modified"]
+    with host_limit(url):
         try:
-            # time.sleep(1)
-            date_published = soup.find(
-                "div", attrs={"class": "article__info-item time"}
-            ).text
-            # date_published = time_published.split(' ')[1]
-            # time.sleep(1)
-            text_article = soup.find_all("div", attrs={"class": "article"})
-            for n in text_article:
-                article = reversed(n.find_all("p"))
-                for el in article:
-                    article_text += el.text
-            article_scrap = {"content": article_text, "date": date_published}
-        except:
-            pass
-    return article_scrap
-
-
-def parse_news_ua(url: str, attr: str, limit=5):
-    """
-    The parse_news_ua function takes in a url and an attribute, and returns a list of dictionaries.
-    The function scrapes the news website for the top 5 articles on that page,
-    and then uses another function to scrape each article's content.
-    It then creates a dictionary with all of this information, which is appended to the list.
-
-    :param url: str: Pass the url of the news site
+            return get_client("unian").get(url, headers=headers)
+        except requests.RequestException:
+            return None
+
+
+def response_validators(response):
+    """
+    The response_validators function returns the cache validators of a response,
+    to be sent back with the next request of the same page.
+
+    :param response: A successful response
+    :return: A dictionary with etag and last_modified keys, or None if the response has neither
+    :doc-author: Trelent
+    """
+    etag = response.headers.get("ETag", "")
+    last_modified = response.headers.get("Last-Modified", "")
+    if not etag and not last_modified:
+        return None
+    return {"etag": etag, "last_modified": last_modified}
+
+
+def make_soup(html: str, parse_only=None, parser=None):
+    """
+    The make_soup function parses html with the fastest available parser backend:
+    lxml when it is installed, the standard html.parser otherwise.
+    A SoupStrainer can be given to build the tree only from the needed elements.
+
+    :param html: str: The html of the page
+    :param parse_only: A SoupStrainer restricting the parsed elements
+    :param parser: Override the parser backend
+    :return: A BeautifulSoup object
+    :doc-author: Trelent
+    """
+    return BeautifulSoup(html, parser or HTML_PARSER, parse_only=parse_only)
+
+
+def headlines_strainer(attr: str):
+    """
+    The headlines_strainer function returns a SoupStrainer keeping only the links
+    that carry every class of attr.
+
     :param attr: str: Specify the class of the news articles
-    :param limit: Limit the number of news articles that are scraped
+    :return: A SoupStrainer
+    :doc-author: Trelent
+    """
+    classes = set(attr.split())
+    return SoupStrainer(
+        "a",
+        attrs={"class": lambda value: bool(value) and classes <= set(value.split())},
+    )
+
+
+def parse_published(text: str):
+    """
+    The parse_published function converts the publication time shown on an article page
+    to an aware datetime.
+
+    :param text: str: The text of the publication time element
+    :return: A datetime, or None if the text has an unknown format
+    :doc-author: Trelent
+    """
+    text = " ".join(text.split())
+    for date_format in UNIAN_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).replace(tzinfo=UNIAN_TIMEZONE)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_article(html: str, parser=None):
+    """
+    The parse_article function extracts the text and the publication date from an article page.
+
+    :param html: str: The html of the article page
+    :param parser: Override the parser backend
+    :return: A dictionary with content and date keys, empty if the page has an unexpected layout;
+        the date is a datetime, the time of scraping if the page shows it in an unknown format
+    :doc-author: Trelent
+    """
+    soup = make_soup(html, ARTICLE_STRAINER, parser)
+    date_published = soup.find("div", attrs={"class": "article__info-item time"})
+    if date_published is None:
+        return {}
+    article_text = "".join(
+        el.text
+        for n in soup.find_all("div", attrs={"class": "article"})
+        for el in reversed(n.find_all("p"))
+    )
+    published = parse_published(date_published.text) or datetime.now(timezone.utc)
+    return {"content": article_text, "date": published}
+
+
+def parse_headlines(html: str, attr: str, limit=5, parser=None):
+    """
+    The parse_headlines function extracts the headlines from a topic page.
+
+    :param html: str: The html of the topic page
+    :param attr: str: Specify the class of the news articles
+    :param limit: Limit the number of news articles that are returned
+    :param parser: Override the parser backend
+    :return: A list of (title, url) tuples
+    :doc-author: Trelent
+    """
+    soup = make_soup(html, headlines_strainer(attr), parser)
+    headlines = []
+    for n in soup.find_all("a", attrs={"class": attr}, limit=limit):
+        img = n.find("img")
+        if img is None or not n.get("href"):
+            continue
+        headlines.append((f"{img.get('alt', '')}", n["href"]))
+    return headlines
+
+
+def fetch_article(url: str, known=None, validators=None):
+    """
+    The fetch_article function downloads and parses an article unless it is known already.
+    A known article is reused as it is, or, where the site provided validators for it,
+    requested conditionally and reused on a 304 response.
+
+    :param url: str: The url of the article
+    :param known: The stored article, a dictionary with content and date keys, if any
+    :param validators: A dictionary of cache validators keyed by url
+    :return: An (article, validators) tuple; the article is None if it could not be scraped
+        and the validators are None unless a new version was downloaded
+    :doc-author: Trelent
+    """
+    if known and not (validators or {}).get(url):
+        return known, None
+    response = fetch(url, validators if known else None)
+    if response is None:
+        return None, None
+    if known and response.status_code == 304:
+        return known, None
+    if response.status_code != 200:
+        return None, None
+    article = parse_article(response.text)
+    if not article:
+        return None, None
+    return article, response_validators(response)
+
+
+def build_news(headlines, articles):
+    """
+    The build_news function joins the headlines of a topic with their scraped articles.
+    Headlines whose article could not be scraped are skipped.
+
+    :param headlines: A list of (title, url) tuples
+    :param articles: A dictionary of scraped articles keyed by url
     :return: A list of dictionaries
     :doc-author: Trelent
     """
     list_news = []
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    if response.status_code == 200:
-        # time.sleep(1)
-        all_news = soup.find_all("a", attrs={"class": attr}, limit=limit)
-        # time.sleep(1)
-        for n in all_news:
-            title_news = f"{n.find('img')['alt']}"
-            url_news = n["href"]
-            try:
-                article = scrap_article(url_news)
-                description = article["content"]
-                date = article["date"]
-                news_dict = {
-                    "title": title_news,
-                    "content": description,
-                    "date": date,
-                    "url": url_news,
-                }
-                list_news.append(news_dict)
-            except:
-                pass
+    for title_news, url_news in headlines:
+        article = articles.get(url_news)
+        if not article:
+            continue
+        list_news.append(
+            {
+                "title": title_news,
+                "content": article["content"],
+                "date": article["date"],
+                "url": url_news,
+            }
+        )
     return list_news
 
 
-def articles_scraped():
+def topic_pages(base_url=UNIAN_URL, sport_url=SPORT_URL):
     """
-    The articles_scraped function scrapes the news from unian.ua and saves it to a json file
-    :return: A dictionary with the following structure:
+    The topic_pages function lists the pages that are scraped for every topic.
+
+    :param base_url: The root of the news site
+    :param sport_url: The root of the sport news site
+    :return: A list of (topic, url, attr) tuples
     :doc-author: Trelent
     """
-    all_data = {}
-    list_topic_news = ["", "war", "science", "world", "society", "economics", "sport"]
-    class1_topics = ["economics", "sport"]
-    class2_topics = ["war", "science", "world", "society"]
-    for topic in list_topic_news:
-        if topic in class1_topics:
+    pages = []
+    for topic in LIST_TOPIC_NEWS:
+        if topic in CLASS1_TOPICS:
             attr_a = "list-news__image"
-        elif topic in class2_topics:
+        elif topic in CLASS2_TOPICS:
             attr_a = "list-thumbs__image"
         else:
             attr_a = "list-news__image psr"
 
-        url = "https://www.unian.ua/" + topic
+        url = base_url + topic
         if topic == "":
             topic = "main"
         elif topic == "sport":
-            url = "https://sport.unian.ua/"
-        # Save data to the dictionary
-        all_data[topic] = parse_news_ua(url, attr_a)
-    # Write the data to the file after the loop
-    # with open(
-    #     os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data.json"),
-    #     "w",
-    #     encoding="utf-8",
-    # ) as f:
-    #     json.dump(all_data, f, ensure_ascii=False)
-    return all_data
+            url = sport_url
+        pages.append((topic, url, attr_a))
+    return pages
+
+
+def articles_scraped(
+    base_url=UNIAN_URL,
+    sport_url=SPORT_URL,
+    max_workers=MAX_WORKERS,
+    known_articles=None,
+    validators=None,
+):
+    """
+    The articles_scraped function scrapes the news from unian.ua.
+    All topic pages are downloaded in parallel first, then all their articles,
+    through a bounded thread pool and the pooled "unian" client.
+
+    The scrape is incremental: the articles returned by known_articles are reused without
+    a download, unless the validators of an earlier run let them be requested conditionally.
+    Topic pages are requested conditionally too and those answered with 304 Not Modified
+    are left out of the result, so only new and changed pages are downloaded and parsed.
+    The validators of a topic page are only recorded once every article of the page was scraped,
+    so the articles that failed are retried by the next run instead of hidden behind a 304.
+
+    :param base_url: The root of the news site, a local fixture server can be used instead
+    :param sport_url: The root of the sport news site
+    :param max_workers: The number of download threads
+    :param known_articles: A function taking a set of urls and returning the already stored
+        articles among them, as a dictionary of {"content", "date"} dictionaries keyed by url
+    :param validators: A dictionary of cache validators keyed by url, updated in place
+    :return: A dictionary with topics as keys and lists of news as values
+    :doc-author: Trelent
+    """
+    pages = topic_pages(base_url, sport_url)
+    with ThreadPoolExecutor(max_workers) as executor:
+        responses = executor.map(lambda page: fetch(page[1], validators), pages)
+        headlines = {}
+        page_validators = {}
+        for (topic, url, attr_a), response in zip(pages, responses):
+            if response is not None and response.status_code == 304:
+                continue
+            if response is None or response.status_code != 200:
+                headlines[topic] = []
+            else:
+                headlines[topic] = parse_headlines(response.text, attr_a)
+                page_validators[topic] = (url, response_validators(response))
+
+        urls = {url_news for items in headlines.values() for _, url_news in items}
+        known = known_articles(urls) if known_articles and urls else {}
+        futures = {
+            url_news: executor.submit(
+                fetch_article, url_news, known.get(url_news), validators
+            )
+            for url_news in urls
+        }
+        articles = {}
+        for url_news, future in futures.items():
+            article, article_validators = future.result()
+            if article:
+                articles[url_news] = article
+            if validators is not None and article_validators:
+                validators[url_news] = article_validators
+
+    if validators is not None:
+        for topic, (url, topic_validators) in page_validators.items():
+            complete = all(url_news in articles for _, url_news in headlines[topic])
+            if complete and topic_validators:
+                validators[url] = topic_validators
+
+    return {topic: build_news(items, articles) for topic, items in headlines.items()}
+
 
 if __name__ == "__main__":
     articles_scraped()
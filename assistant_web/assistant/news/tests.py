@@ -1,3 +1,76 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from . import fixture_server
+from .fixture_server import FixtureServer
+from .scrap_news import articles_scraped, topic_pages
+
+
+class IncrementalScrapeTests(SimpleTestCase):
+    def scrape(self, server, known=None, validators=None):
+        server.requests = 0
+        return articles_scraped(
+            server.base_url,
+            server.sport_url,
+            known_articles=lambda urls: (
+                {url: known[url] for url in urls if url in known} if known else {}
+            ),
+            validators=validators,
+        )
+
+    @staticmethod
+    def stored(news):
+        return {
+            item["url"]: {"content": item["content"], "date": item["date"]}
+            for items in news.values()
+            for item in items
+        }
+
+    def test_known_articles_without_validators_are_not_downloaded(self):
+        with FixtureServer(latency=0, etags=False) as server:
+            pages = len(topic_pages(server.base_url, server.sport_url))
+            known = self.stored(self.scrape(server))
+
+            validators = {}
+            news = self.scrape(server, known, validators)
+
+        self.assertEqual(server.requests, pages)
+        self.assertEqual(validators, {})
+        self.assertEqual(self.stored(news), known)
+
+    def test_known_articles_with_validators_are_requested_conditionally(self):
+        with FixtureServer(latency=0) as server:
+            pages = topic_pages(server.base_url, server.sport_url)
+            validators = {}
+            known = self.stored(self.scrape(server, validators=validators))
+            for _, url, _ in pages:
+                # The topic pages are downloaded again, so their articles are checked
+                del validators[url]
+
+            original = fixture_server.article_page
+            with mock.patch.object(
+                fixture_server,
+                "article_page",
+                lambda name: original(name).replace("Paragraph 0", "Edited"),
+            ):
+                news = self.scrape(server, known, validators)
+
+        self.assertEqual(server.requests, len(pages) + len(known))
+        self.assertTrue(
+            all("Edited" in item["content"] for item in self.stored(news).values())
+        )
+
+    def test_topic_validators_wait_for_every_article(self):
+        with FixtureServer(latency=0) as server:
+            original = fixture_server.article_page
+            with mock.patch.object(
+                fixture_server,
+                "article_page",
+                lambda name: None if name == "war-2" else original(name),
+            ):
+                validators = {}
+                self.scrape(server, validators=validators)
+
+            self.assertNotIn(server.base_url + "war", validators)
+            self.assertIn(server.base_url + "economics", validators)
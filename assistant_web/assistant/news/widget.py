@@ -0,0 +1,92 @@
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .background import run_in_background
+from .views import fetch_news
+
+
+def widget_cache_key(lang):
+    """
+    The widget_cache_key function returns the cache key of the headline snapshot for a language.
+
+    :param lang: The language of the snapshot
+    :return: A string
+    :doc-author: Trelent
+    """
+    return f"news:widget:{lang}"
+
+
+def build_snapshot(lang):
+    """
+    The build_snapshot function fetches the latest headlines for a language
+    and keeps only the fields the widget renders.
+
+    :param lang: Specify the language of news
+    :return: A list of dictionaries with title and url keys
+    :doc-author: Trelent
+    """
+    snapshot = []
+    for item in fetch_news(lang):
+        if isinstance(item, dict):
+            snapshot.append({"title": item.get("title"), "url": item.get("url")})
+        else:
+            snapshot.append({"title": item.title, "url": item.url})
+    return snapshot
+
+
+def refresh_widget(lang):
+    """
+    The refresh_widget function rebuilds the headline snapshot for a language and stores it in the cache.
+    If the upstream cannot be read, the previous snapshot is kept.
+
+    :param lang: Specify the language of news
+    :return: The new snapshot, or None if it could not be built
+    :doc-author: Trelent
+    """
+    try:
+        snapshot = build_snapshot(lang)
+    except (requests.RequestException, ValueError):
+        return None
+    cache.set(
+        widget_cache_key(lang),
+        {"news": snapshot, "fetched_at": time.time()},
+        timeout=None,
+    )
+    return snapshot
+
+
+def invalidate_widget(lang="uk"):
+    """
+    The invalidate_widget function drops the cached snapshot for a language,
+    so the next render picks up freshly saved news.
+
+    :param lang: The language of the snapshot
+    :return: None
+    :doc-author: Trelent
+    """
+    cache.delete(widget_cache_key(lang))
+
+
+def get_latest_news(lang="en"):
+    """
+    The get_latest_news function returns the cached headline snapshot for a language.
+    Ukrainian headlines come from our own database, so a missing snapshot is rebuilt inline.
+    English headlines come from NewsAPI, so a missing or stale snapshot is refreshed
+    in the background and the page is rendered with what is in the cache.
+
+    :param lang: Specify the language of news
+    :return: A list of dictionaries with title and url keys
+    :doc-author: Trelent
+    """
+    entry = cache.get(widget_cache_key(lang))
+    if entry is None:
+        if lang != "en":
+            return refresh_widget(lang) or []
+        run_in_background(f"{widget_cache_key(lang)}:refreshing", refresh_widget, lang)
+        return []
+    if time.time() - entry["fetched_at"] > settings.NEWS_WIDGET_CACHE_TTL:
+        run_in_background(f"{widget_cache_key(lang)}:refreshing", refresh_widget, lang)
+    return entry["news"]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from notes.models import Note, note_search_vector
+from notes.triggers import install_search_trigger
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vectors of all notes (PostgreSQL only)"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Note search vectors are only stored on PostgreSQL")
+        # The trigger computes the vectors with the current NOTES_SEARCH_CONFIG from now on
+        install_search_trigger(connection)
+        updated = Note.objects.update(search_vector=note_search_vector())
+        self.stdout.write(f"Rebuilt the search vectors of {updated} notes")
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def fill_tag_set(apps, schema_editor):
+    """Create Tag rows from the existing comma separated tags strings."""
+    Note = apps.get_model("notes", "Note")
+    Tag = apps.get_model("notes", "Tag")
+    Through = Note.tag_set.through
+
+    notes = list(Note.objects.values_list("id", "tags"))
+    names_by_note = {
+        note_id: {tag.strip() for tag in tags.split(",") if tag.strip()}
+        for note_id, tags in notes
+    }
+    all_names = set().union(*names_by_note.values())
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in all_names], ignore_conflicts=True
+    )
+    tag_ids = dict(Tag.objects.values_list("name", "id"))
+    Through.objects.bulk_create(
+        [
+            Through(note_id=note_id, tag_id=tag_ids[name])
+            for note_id, names in names_by_note.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0003_tag_note_tag_set"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_tag_set, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0004_fill_tag_set"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(fields=["user", "tags"], name="note_user_tags_idx"),
+        ),
+    ]
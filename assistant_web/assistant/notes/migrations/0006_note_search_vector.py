@@ -0,0 +1,56 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+INDEX = GinIndex(fields=["search_vector"], name="note_search_vector_idx")
+
+
+def add_search_index(apps, schema_editor):
+    """Index and fill the search vectors, PostgreSQL only: other databases keep them NULL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Note = apps.get_model("notes", "Note")
+    schema_editor.add_index(Note, INDEX)
+    config = settings.NOTES_SEARCH_CONFIG
+    Note.objects.update(
+        search_vector=SearchVector("text", weight="A", config=config)
+        + SearchVector("tags", weight="B", config=config)
+    )
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.remove_index(apps.get_model("notes", "Note"), INDEX)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0005_note_note_user_tags_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="note",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="note_search_vector_idx"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_search_index, remove_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0007_alter_note_user"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="note",
+            name="note_user_tags_idx",
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["user", "tags", "id"], name="note_user_tags_idx"
+            ),
+        ),
+    ]
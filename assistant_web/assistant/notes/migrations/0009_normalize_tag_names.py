@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def normalize_tag_names(apps, schema_editor):
+    """Merge the tags differing only by case or spaces and delete the unused ones."""
+    Tag = apps.get_model("notes", "Tag")
+    Through = apps.get_model("notes", "Note").tag_set.through
+
+    Tag.objects.filter(notes=None).delete()
+    kept = {}
+    for tag in Tag.objects.order_by("id"):
+        name = tag.name.strip().lower()
+        if name not in kept:
+            kept[name] = tag
+            continue
+        # Link the notes of the duplicate to the kept tag, then drop the duplicate
+        note_ids = Through.objects.filter(tag_id=tag.id).values_list(
+            "note_id", flat=True
+        )
+        Through.objects.bulk_create(
+            [Through(note_id=note_id, tag_id=kept[name].id) for note_id in note_ids],
+            ignore_conflicts=True,
+        )
+        tag.delete()
+    for name, tag in kept.items():
+        if tag.name != name:
+            tag.name = name
+            tag.save(update_fields=["name"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0008_note_user_tags_idx_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_tag_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# Computes the search vector of every inserted or updated note with the default "simple"
+# configuration; rebuild_note_search installs it again with NOTES_SEARCH_CONFIG
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION notes_note_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple'::regconfig, COALESCE(NEW.text, '')), 'A')
+        || setweight(to_tsvector('simple'::regconfig, COALESCE(NEW.tags, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE TRIGGER note_search_vector_trigger
+BEFORE INSERT OR UPDATE ON notes_note
+FOR EACH ROW EXECUTE FUNCTION notes_note_search_vector()
+"""
+
+
+def add_search_trigger(apps, schema_editor):
+    """Compute the search vectors in the database, PostgreSQL only: other databases keep them NULL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(SEARCH_VECTOR_FUNCTION)
+    schema_editor.execute(SEARCH_VECTOR_TRIGGER)
+    # Fires the trigger on every note, including those written without save() so far
+    apps.get_model("notes", "Note").objects.update(search_vector=None)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS note_search_vector_trigger ON notes_note"
+    )
+    schema_editor.execute("DROP FUNCTION IF EXISTS notes_note_search_vector()")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0009_normalize_tag_names"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_trigger, drop_search_trigger),
+    ]
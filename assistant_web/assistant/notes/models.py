@@ -1,10 +1,126 @@
-from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+
+def note_search_vector():
+    """
+    The note_search_vector function returns the expression computing the search vector of a note:
+    the words of the text weighted A, the words of the tags weighted B.
+
+    :return: A SearchVector expression
+    :doc-author: Trelent
+    """
+    config = settings.NOTES_SEARCH_CONFIG
+    return SearchVector("text", weight="A", config=config) + SearchVector(
+        "tags", weight="B", config=config
+    )
+
+
+def normalize_tag(name):
+    """
+    The normalize_tag function gives the name a tag is stored and looked up by,
+    so "Work" and "work " are the same tag.
+
+    :param name: A tag name as entered
+    :return: The stripped, lowercase name
+    :doc-author: Trelent
+    """
+    return name.strip().lower()
+
+
+def prune_tags(tag_ids):
+    """
+    The prune_tags function deletes the given tags that no note uses anymore.
+
+    :param tag_ids: The primary keys of the tags a note was unlinked from
+    :return: None
+    :doc-author: Trelent
+    """
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids, notes=None).delete()
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=255, unique=True)  # see normalize_tag
+
+    def __str__(self):
+        return self.name
+
 
 class Note(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed as the first column of note_user_tags_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     text = models.TextField()
-    tags = models.CharField(max_length=255)
+    tags = models.CharField(max_length=255)  # tags as entered, e.g. "Tag_1, Tag_2"
+    tag_set = models.ManyToManyField(Tag, related_name="notes", blank=True)
+    # Computed by a trigger on PostgreSQL (see notes.triggers), always NULL on other databases
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the note list ordering, see notes.views.NOTE_ORDERING
+            models.Index(fields=["user", "tags", "id"], name="note_user_tags_idx"),
+            # Created by migration 0006 on PostgreSQL only
+            GinIndex(fields=["search_vector"], name="note_search_vector_idx"),
+        ]
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        """
+        The save function saves the note and keeps its tag_set in sync with the tags string.
+        The search_vector is computed by the database.
+
+        :param self: Represent the instance of the class
+        :return: None
+        :doc-author: Trelent
+        """
+        super().save(*args, **kwargs)
+        self.sync_tags()
+
+    def tag_names(self):
+        """
+        The tag_names function splits the tags string into a list of tag names.
+
+        :param self: Represent the instance of the class
+        :return: A list of strings
+        :doc-author: Trelent
+        """
+        return [tag.strip() for tag in self.tags.split(",") if tag.strip()]
+
+    def sync_tags(self):
+        """
+        The sync_tags function links the note to a Tag row for each of its normalized tag names,
+        creating the tags that do not exist yet and deleting the dropped ones no note uses.
+
+        :param self: Represent the instance of the class
+        :return: None
+        :doc-author: Trelent
+        """
+        names = {normalize_tag(name) for name in self.tag_names()}
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
+        )
+        tags = list(Tag.objects.filter(name__in=names))
+        dropped = self.tag_set.exclude(pk__in=[tag.pk for tag in tags])
+        dropped_ids = list(dropped.values_list("pk", flat=True))
+        self.tag_set.set(tags)
+        prune_tags(dropped_ids)
+
+
+@receiver(pre_delete, sender=Note)
+def remember_note_tags(sender, instance, **kwargs):
+    # The links to the tags are deleted before post_delete
+    instance._tag_ids = list(instance.tag_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Note)
+def prune_deleted_note_tags(sender, instance, **kwargs):
+    # Also runs for the notes deleted with their user
+    prune_tags(getattr(instance, "_tag_ids", None))
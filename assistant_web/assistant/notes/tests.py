@@ -1,3 +1,63 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Note, Tag, normalize_tag
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tagger")
+
+    def tag_names(self):
+        return set(Tag.objects.values_list("name", flat=True))
+
+    def note(self, tags, user=None):
+        return Note.objects.create(user=user or self.user, text="Text", tags=tags)
+
+    def test_normalize_tag(self):
+        self.assertEqual(normalize_tag("  Work "), "work")
+        self.assertEqual(normalize_tag("ПРОЄКТ"), "проєкт")
+
+    def test_tags_differing_in_case_are_the_same_tag(self):
+        first = self.note("Work, Home")
+        second = self.note("work , HOME,  ,")
+        self.assertEqual(self.tag_names(), {"work", "home"})
+        self.assertEqual(
+            set(first.tag_set.values_list("pk", flat=True)),
+            set(second.tag_set.values_list("pk", flat=True)),
+        )
+
+    def test_search_by_tags_ignores_the_case(self):
+        work = self.note("Work")
+        self.note("Home")
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("notes:search_note"), {"q": "WORK.", "mode": "tags"}
+        )
+        self.assertEqual([note.pk for note in response.context["notes"]], [work.pk])
+
+    def test_dropped_tags_are_pruned(self):
+        note = self.note("work, home")
+        other = self.note("home")
+        note.tags = "Work, travel"
+        note.save()
+        self.assertEqual(self.tag_names(), {"work", "home", "travel"})
+
+        other.tags = "travel"
+        other.save()
+        self.assertEqual(self.tag_names(), {"work", "travel"})
+
+    def test_deleted_notes_prune_their_tags(self):
+        note = self.note("work, home")
+        self.note("home")
+        note.delete()
+        self.assertEqual(self.tag_names(), {"home"})
+
+    def test_deleted_users_prune_their_tags(self):
+        other = User.objects.create_user("other")
+        self.note("shared")
+        self.note("shared, private", user=other)
+        other.delete()
+        self.assertEqual(self.tag_names(), {"shared"})
@@ -0,0 +1,38 @@
+from django.conf import settings
+
+# Fills the search vector of every inserted or updated note like note_search_vector(),
+# so notes written by bulk_create, update() or raw SQL are searchable too
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION notes_note_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector(%s::regconfig, COALESCE(NEW.text, '')), 'A')
+        || setweight(to_tsvector(%s::regconfig, COALESCE(NEW.tags, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE TRIGGER note_search_vector_trigger
+BEFORE INSERT OR UPDATE ON notes_note
+FOR EACH ROW EXECUTE FUNCTION notes_note_search_vector()
+"""
+
+
+def install_search_trigger(connection):
+    """
+    The install_search_trigger function (re)creates the PostgreSQL trigger computing the
+    search vectors of the notes with the current NOTES_SEARCH_CONFIG.
+
+    :param connection: A PostgreSQL database connection
+    :return: None
+    :doc-author: Trelent
+    """
+    config = settings.NOTES_SEARCH_CONFIG
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_VECTOR_FUNCTION, [config, config])
+        cursor.execute(
+            "DROP TRIGGER IF EXISTS note_search_vector_trigger ON notes_note"
+        )
+        cursor.execute(SEARCH_VECTOR_TRIGGER)
@@ -1,9 +1,62 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
-from .models import Note
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from assistant.pagination import paginate_keyset
+from .models import Note, Tag, normalize_tag
 from .forms import NoteForm
 
+# Notes are sorted by tags, notes with the same tags in the order they were created.
+# The text is left out of the key: it is unbounded and would end up in the cursor url.
+NOTE_ORDERING = ("tags", "pk")
+
+
+def count_tags(notes):
+    """
+    The count_tags function counts how many of the given notes carry each tag.
+    The counting is done by the database in a single aggregated query.
+
+    :param notes: A queryset of notes
+    :return: A dictionary with tag names as keys and counts as values, sorted by name
+    :doc-author: Trelent
+    """
+    tags = (
+        Tag.objects.filter(notes__in=notes.values("pk"))
+        .annotate(count=Count("notes"))
+        .order_by("name")
+        .values_list("name", "count")
+    )
+    return dict(tags)
+
+
+def search_text(notes, query):
+    """
+    The search_text function finds the notes whose text or tags match a full-text query.
+    On PostgreSQL the query is looked up in the GIN index of the stored search vectors
+    and the notes are ranked by relevance; on other databases (e.g. SQLite test databases)
+    every word of the query must appear in the text or the tags.
+
+    :param notes: A queryset of notes
+    :param query: The query as typed by the user, "quoted phrases", or and -word are understood
+    :return: A tuple of the matching notes and their keyset ordering
+    :doc-author: Trelent
+    """
+    if connection.vendor == "postgresql":
+        search_query = SearchQuery(
+            query, search_type="websearch", config=settings.NOTES_SEARCH_CONFIG
+        )
+        # ts_rank is a real, a double makes the rank in the cursor round-trip
+        notes = notes.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+        )
+        return notes, ("-rank", "pk")
+    for word in query.split():
+        notes = notes.filter(Q(text__icontains=word) | Q(tags__icontains=word))
+    return notes, NOTE_ORDERING
+
 
 @login_required
 def note_list(request):
@@ -15,18 +68,14 @@ def note_list(request):
     :return: A template with the notes and tags_count variables
     :doc-author: Trelent
     """
-    notes = Note.objects.filter(user=request.user).order_by("tags", "text")
-    for note in notes:
-        note.tags_list = note.tags.split(",")
-    all_tags = set(tag for note in notes for tag in note.tags.split(","))
-    tags_count = {
-        tag: sum(1 for note in notes if tag in note.tags.split(",")) for tag in all_tags
-    }
-    sorted_tags_count = {tag: count for tag, count in sorted(tags_count.items())}
+    notes = Note.objects.filter(user=request.user)
+    page = paginate_keyset(request, notes, NOTE_ORDERING)
+    for note in page:
+        note.tags_list = note.tag_names()
     return render(
         request,
         "notes/note_list.html",
-        {"notes": notes, "tags_count": sorted_tags_count},
+        {"notes": page, "tags_count": count_tags(notes)},
     )
 
 
@@ -102,9 +151,10 @@ def search_note(request):
     """
     The search_note function takes a request object as an argument.
     The function then gets the query from the request object and checks if it is empty. If it is,
-    the user will be redirected to the note_list page. The cleaned_query variable removes any commas or periods
-    from the query string and strips any whitespace from both ends of that string. The tags variable splits up
+    the user will be redirected to the note_list page. The cleaned_query variable replaces any commas with spaces
+    and strips any whitespace from both ends of that string. The tags variable splits up
     the cleaned_query into a list of strings based on spaces in between words in that string (e.g., &quot;hello world&quot; would become [&quot;hello&quot;, &quot;world&quot;]). If there are no tags, then we redirect to note
+    With mode=text the query is a full-text search over the text and the tags instead, see search_text.
 
     :param request: Get the request object
     :return: The note_list
@@ -113,31 +163,37 @@ def search_note(request):
     query = request.GET.get("q")
     if not query:
         return redirect("notes:note_list")
-    cleaned_query = query.replace(",", "").replace(".", "").strip()
+    mode = request.GET.get("mode", "tags")
 
-    tags = cleaned_query.split()
+    if mode == "text":
+        notes, ordering = search_text(Note.objects.filter(user=request.user), query)
+    else:
+        cleaned_query = query.replace(",", " ").strip()
 
-    if not tags:
-        return redirect("notes:note_list")
+        tags = [
+            normalize_tag(tag.strip("."))
+            for tag in cleaned_query.split()
+            if tag.strip(".")
+        ]
 
-    q_objects = Q()
-    for tag in tags:
-        q_objects |= Q(tags__icontains=tag)
+        if not tags:
+            return redirect("notes:note_list")
 
-    notes = Note.objects.filter(user=request.user).filter(q_objects)
+        # Indexed lookup through the Tag table, whose names are normalized
+        notes = Note.objects.filter(
+            user=request.user, tag_set__name__in=tags
+        ).distinct()
+        ordering = NOTE_ORDERING
+    page = paginate_keyset(request, notes, ordering)
 
-    for note in notes:
-        note.tags_list = note.tags.split(",")
+    for note in page:
+        note.tags_list = note.tag_names()
 
-    all_tags = set(tag for note in notes for tag in note.tags.split(","))
-    tags_count = {
-        tag: sum(1 for note in notes if tag in note.tags.split(",")) for tag in all_tags
-    }
-    sorted_tags_count = {tag: count for tag, count in sorted(tags_count.items())}
     context = {
-        "notes": notes,
+        "notes": page,
         "query": query,
-        "tags_count": sorted_tags_count,
+        "mode": mode,
+        "tags_count": count_tags(notes),
     }
 
     return render(request, "notes/note_list.html", context)
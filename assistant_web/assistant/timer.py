@@ -1,7 +1,57 @@
+import logging
+import threading
 import time
-from news.scrap_news import articles_scraped
 
-def start_timer():
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def run_every(interval, job_path):
+    """
+    The run_every function runs a job every interval seconds.
+    A failed run is skipped, the next one is attempted on schedule.
+
+    :param interval: Seconds between two runs
+    :param job_path: Dotted path of the job function
+    :return: None
+    :doc-author: Trelent
+    """
+    import django
+
+    django.setup()
+    job = import_string(job_path)
+
     while True:
-        articles_scraped()
-        time.sleep(3600)
\ No newline at end of file
+        try:
+            job()
+        except Exception:
+            logger.exception("%s failed", job_path)
+        time.sleep(interval)
+
+
+def start_timer():
+    """
+    The start_timer function starts the in-process background jobs, each in its own daemon thread:
+    the Ukrainian news ingestion every NEWS_INGEST_INTERVAL seconds and
+    the NewsAPI cache refresh every NEWSAPI_REFRESH_INTERVAL seconds.
+    A job with an interval of 0 is not started; in production the ingest_news and
+    refresh_newsapi management commands can be run as separate workers instead.
+
+    :return: A list of the started threads
+    :doc-author: Trelent
+    """
+    jobs = [
+        (settings.NEWS_INGEST_INTERVAL, "news.ingest.fill_news"),
+        (settings.NEWSAPI_REFRESH_INTERVAL, "news.newsapi.refresh_all_categories"),
+    ]
+    threads = []
+    for interval, job_path in jobs:
+        if not interval:
+            continue
+        thread = threading.Thread(target=run_every, args=(interval, job_path))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    return threads